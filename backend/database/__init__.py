@@ -6,20 +6,27 @@ from typing import Annotated as _Annotated
 from fastapi import Depends as _Depends
 
 # NOTE: Do not import from here in other files.
+from sqlalchemy.ext.asyncio import AsyncSession as _AsyncSession
 from sqlalchemy.orm import Session as _Session
 
+from backend.database import change_notifications as _change_notifications
+from backend.database.db_session import get_async_db as _get_async_db
 from backend.database.db_session import get_db as _get_db
 from backend.database.models.base import ORMBase
+from backend.database.models.daily_load import DailyLoad
 from backend.database.models.external_calendar import ExternalCalendar
 from backend.database.models.plannable_attributes import PlannableTag, Recurrence, Tag
 from backend.database.models.plannables import Event, Plannable, Task
+from backend.database.models.tombstone import Tombstone
 from backend.database.models.user import User, UserModelParameters, UserSettings
 
 DBSession = _Annotated[_Session, _Depends(_get_db)]
+AsyncDBSession = _Annotated[_AsyncSession, _Depends(_get_async_db)]
 
 # NOTE: Public API - in other files import only these.
 __all__ = [
     "ORMBase",
+    "DailyLoad",
     "ExternalCalendar",
     "PlannableTag",
     "Recurrence",
@@ -27,8 +34,10 @@ __all__ = [
     "Event",
     "Plannable",
     "Task",
+    "Tombstone",
     "User",
     "UserModelParameters",
     "UserSettings",
     "DBSession",
+    "AsyncDBSession",
 ]
@@ -0,0 +1,47 @@
+from sqlalchemy import DDL
+from sqlalchemy import event as sa_event
+
+from backend.database.models.base import ORMBase
+
+# Postgres channel notified of changed plannables, with a JSON payload of
+# {"username": ..., "table": "plannable" | "task" | "event"} per user and statement.
+CHANGES_CHANNEL = "calendar_changes"
+_TABLES = ("plannable", "task", "event")
+
+# Statement-level triggers, so that bulk writes notify once per user, not per row. NOTIFY
+# is only delivered on commit, and identical payloads of a transaction are sent once.
+NOTIFY_CHANGES_SQL = f"""
+CREATE OR REPLACE FUNCTION notify_calendar_changes() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        '{CHANGES_CHANNEL}',
+        json_build_object('username', username, 'table', TG_TABLE_NAME)::text
+    )
+    FROM (SELECT DISTINCT username FROM changed_rows) AS changed;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""" + "".join(
+    f"""
+CREATE OR REPLACE TRIGGER {table}_notify_{operation} AFTER {operation.upper()} ON {table}
+REFERENCING {rows} TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_calendar_changes();
+"""
+    for table in _TABLES
+    for operation, rows in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD"))
+)
+
+DROP_NOTIFY_CHANGES_SQL = (
+    "".join(
+        f"DROP TRIGGER IF EXISTS {table}_notify_{operation} ON {table};\n"
+        for table in _TABLES
+        for operation in ("insert", "update", "delete")
+    )
+    + "DROP FUNCTION IF EXISTS notify_calendar_changes();\n"
+)
+
+sa_event.listen(
+    ORMBase.metadata,
+    "after_create",
+    DDL(NOTIFY_CHANGES_SQL).execute_if(dialect="postgresql"),
+)
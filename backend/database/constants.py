@@ -7,5 +7,18 @@ db_host = os.getenv("POSTGRES_HOST", "postgres")
 db_port = os.getenv("POSTGRES_PORT", "5432")
 
 DATABASE_URL = f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
 EVENT_POLYMORPHIC_IDENTITY = "event"
 TASK_POLYMORPHIC_IDENTITY = "task"
+
+# Connection pool settings, shared by the sync and async engines (each has its own pool).
+# Connections kept open per worker process.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+# Extra connections allowed on bursts, closed once returned to the pool.
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+# Seconds to wait for a free connection before giving up.
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Seconds after which a connection is replaced (avoids server/proxy idle timeouts).
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Test connections on checkout, so that dropped ones are replaced transparently.
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
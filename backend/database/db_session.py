@@ -1,15 +1,38 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
-from backend.database.constants import DATABASE_URL
+from backend.database.constants import (
+    ASYNC_DATABASE_URL,
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+)
 
-engine = create_engine(DATABASE_URL)
+pool_settings = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+# Used for schema management and other blocking code (e.g., scripts).
+engine = create_engine(DATABASE_URL, **pool_settings)
+# Used by the request handlers, so that waiting on the DB doesn't block a worker thread.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_settings)
 
 # Session factory: calling SessionLocal() gives you a new database session
 # bound to the engine. Each session manages queries, transactions, and commits.
 SessionLocal = sessionmaker(bind=engine)
+# Same for async sessions. Don't expire objects on commit, since reloading
+# expired attributes would require implicit (and forbidden) async IO.
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, expire_on_commit=False)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -25,3 +48,16 @@ def get_db() -> Generator[Session, None, None]:
         raise
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Provide an async database session and automatically commit/rollback and close it.
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
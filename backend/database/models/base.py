@@ -1,7 +1,7 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, func
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy import BigInteger, DateTime, Text, cast, func, text
+from sqlalchemy.orm import DeclarativeBase, Mapped, MappedColumn, mapped_column
 
 # To determine the cardinality of a relationship of tables P and C:
 #
@@ -50,3 +50,25 @@ class TimestampMixin:
         server_default=func.now(),
         onupdate=func.now(),
     )
+
+
+# ID of the current transaction (`xid8`, which never wraps around), as a BIGINT.
+CURRENT_XID_SQL = "CAST(CAST(pg_current_xact_id() AS TEXT) AS BIGINT)"
+
+
+def change_xid_column() -> MappedColumn[int]:
+    """
+    Column holding the ID of the transaction that last inserted/updated the row.
+
+    Used as the change token of the sync feed (see services/sync.py). Unlike
+    timestamps, it can be compared with the oldest transaction still running
+    when a client last synced, so that no concurrent write is ever skipped.
+    NOTE: Set by SQLAlchemy on UPDATE, so raw SQL updates must set it too.
+    """
+    return mapped_column(
+        "change_xid",
+        BigInteger,
+        nullable=False,
+        server_default=text(f"({CURRENT_XID_SQL})"),
+        onupdate=cast(cast(func.pg_current_xact_id(), Text), BigInteger),
+    )
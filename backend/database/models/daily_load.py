@@ -0,0 +1,174 @@
+# mypy: disable-error-code="attr-defined, no-redef"
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from sqlalchemy import DDL, Date, ForeignKey, Interval, String
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.database.models.base import ORMBase
+from backend.misc.defaults import DefaultUserSettings
+
+
+class DailyLoad(ORMBase):
+    """
+    Time booked by a user's one-off events on each local day (in their timezone).
+
+    Rows are maintained by DB triggers (see below) on every write of `event`,
+    `recurrence` and the user's timezone, so reading the load of a few days
+    never aggregates the user's whole history. Recurring events aren't
+    included, since they never end (see services/daily_load.py).
+    """
+
+    __tablename__ = "daily_load"
+
+    # Keys.
+    username: Mapped[str] = mapped_column(
+        String(),
+        ForeignKey("user.username", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(
+        Date,
+        primary_key=True,
+    )
+
+    # Data fields.
+    # Days whose events were all deleted are kept, with nothing booked.
+    booked: Mapped[timedelta] = mapped_column(
+        Interval,
+        nullable=False,
+    )
+
+
+# Also run by the migration that introduced the table. Events are stored in naive UTC,
+# and split at the local midnights of the user's timezone.
+MAINTAIN_DAILY_LOAD_SQL = f"""
+CREATE OR REPLACE FUNCTION add_daily_load(
+    load_username text, load_start timestamp, load_end timestamp, factor integer
+) RETURNS void AS $$
+DECLARE
+    zone text;
+BEGIN
+    SELECT coalesce(settings.timezone, '{DefaultUserSettings.timezone}') INTO zone
+    FROM "user" LEFT JOIN user_settings AS settings USING (username)
+    WHERE "user".username = load_username;
+    -- Deleted users (incl. events deleted in cascade) have no load left to maintain.
+    IF NOT FOUND OR load_end <= load_start THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO daily_load AS daily (username, day, booked)
+    SELECT load_username, local_day::date,
+        factor * (least(load_end, day_end) - greatest(load_start, day_start))
+    FROM generate_series(
+        ((load_start AT TIME ZONE 'UTC') AT TIME ZONE zone)::date::timestamp,
+        (((load_end AT TIME ZONE 'UTC') AT TIME ZONE zone) - interval '1 microsecond')
+            ::date::timestamp,
+        interval '1 day'
+    ) AS local_day
+    CROSS JOIN LATERAL (
+        SELECT
+            (local_day AT TIME ZONE zone) AT TIME ZONE 'UTC' AS day_start,
+            ((local_day + interval '1 day') AT TIME ZONE zone) AT TIME ZONE 'UTC' AS day_end
+    ) AS bounds
+    ON CONFLICT (username, day) DO UPDATE SET booked = daily.booked + EXCLUDED.booked;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rebuild_daily_load(load_username text) RETURNS void AS $$
+BEGIN
+    DELETE FROM daily_load WHERE username = load_username;
+    PERFORM add_daily_load(username, start, "end", 1)
+    FROM event
+    WHERE username = load_username
+        AND NOT EXISTS (SELECT FROM recurrence WHERE plannable_id = event.id);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION track_event_load() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        IF NOT EXISTS (SELECT FROM recurrence WHERE plannable_id = OLD.id) THEN
+            PERFORM add_daily_load(OLD.username, OLD.start, OLD."end", -1);
+        END IF;
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        IF NOT EXISTS (SELECT FROM recurrence WHERE plannable_id = NEW.id) THEN
+            PERFORM add_daily_load(NEW.username, NEW.start, NEW."end", 1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Per statement, so that an event gaining/losing several recurrences at once counts once.
+CREATE OR REPLACE FUNCTION track_recurrence_load() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        -- Events that just became recurring.
+        PERFORM add_daily_load(username, start, "end", -1)
+        FROM event
+        WHERE id IN (SELECT plannable_id FROM changed_rows)
+            AND NOT EXISTS (
+                SELECT FROM recurrence
+                WHERE plannable_id = event.id AND id NOT IN (SELECT id FROM changed_rows)
+            );
+    ELSE
+        -- Events that aren't recurring anymore.
+        PERFORM add_daily_load(username, start, "end", 1)
+        FROM event
+        WHERE id IN (SELECT plannable_id FROM changed_rows)
+            AND NOT EXISTS (SELECT FROM recurrence WHERE plannable_id = event.id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION track_timezone_load() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM rebuild_daily_load(OLD.username);
+    ELSE
+        PERFORM rebuild_daily_load(NEW.username);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER event_daily_load
+AFTER INSERT OR DELETE OR UPDATE OF username, start, "end" ON event
+FOR EACH ROW EXECUTE FUNCTION track_event_load();
+
+CREATE OR REPLACE TRIGGER recurrence_daily_load_insert AFTER INSERT ON recurrence
+REFERENCING NEW TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION track_recurrence_load();
+
+CREATE OR REPLACE TRIGGER recurrence_daily_load_delete AFTER DELETE ON recurrence
+REFERENCING OLD TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION track_recurrence_load();
+
+CREATE OR REPLACE TRIGGER user_settings_daily_load
+AFTER INSERT OR DELETE OR UPDATE OF timezone ON user_settings
+FOR EACH ROW EXECUTE FUNCTION track_timezone_load();
+"""
+
+DROP_DAILY_LOAD_SQL = """
+DROP TRIGGER IF EXISTS user_settings_daily_load ON user_settings;
+DROP TRIGGER IF EXISTS recurrence_daily_load_delete ON recurrence;
+DROP TRIGGER IF EXISTS recurrence_daily_load_insert ON recurrence;
+DROP TRIGGER IF EXISTS event_daily_load ON event;
+DROP FUNCTION IF EXISTS track_timezone_load();
+DROP FUNCTION IF EXISTS track_recurrence_load();
+DROP FUNCTION IF EXISTS track_event_load();
+DROP FUNCTION IF EXISTS rebuild_daily_load(text);
+DROP FUNCTION IF EXISTS add_daily_load(text, timestamp, timestamp, integer);
+"""
+
+# After all tables are created, since the triggers are on other tables.
+sa_event.listen(
+    ORMBase.metadata,
+    "after_create",
+    DDL(MAINTAIN_DAILY_LOAD_SQL).execute_if(dialect="postgresql"),
+)
@@ -1,9 +1,10 @@
 # mypy: disable-error-code="attr-defined, no-redef"
 from __future__ import annotations
 
+from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy import DateTime, ForeignKey, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.database.models.base import ORMBase, TimestampMixin
@@ -21,7 +22,7 @@ class ExternalCalendar(ORMBase, TimestampMixin):
         primary_key=True,
         autoincrement=True,
     )
-    username: Mapped[str | None] = mapped_column(
+    username: Mapped[str] = mapped_column(
         String(),
         ForeignKey("user.username", ondelete="CASCADE"),
         nullable=False,
@@ -32,6 +33,42 @@ class ExternalCalendar(ORMBase, TimestampMixin):
         String(),
         nullable=False,
     )
+    # Where the .ics feed is downloaded from (NULL for one-off file uploads).
+    url: Mapped[str | None] = mapped_column(
+        String(),
+        nullable=True,
+    )
+
+    # Sync state, used to skip or minimise work when the feed hasn't changed.
+    # Validators sent back to the provider in a conditional GET.
+    etag: Mapped[str | None] = mapped_column(
+        String(),
+        nullable=True,
+    )
+    last_modified: Mapped[str | None] = mapped_column(
+        String(),
+        nullable=True,
+    )
+    # SHA-256 of the last imported feed, for providers without validators.
+    content_hash: Mapped[str | None] = mapped_column(
+        String(),
+        nullable=True,
+    )
+    last_synced_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    # Background sync schedule, shared by all the worker processes: consecutive
+    # failed syncs (which back off exponentially), and when to sync next.
+    failure_count: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+    )
+    next_sync_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,  # NULL == as soon as possible.
+    )
 
     # Relationships.
     # 0..N : 1
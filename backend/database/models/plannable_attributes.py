@@ -4,10 +4,12 @@ from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import DateTime, Enum, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import DDL, DateTime, Enum, ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy import event as sa_event
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from backend.database.models.base import ORMBase, TimestampMixin
+from backend.database.models.base import CURRENT_XID_SQL, ORMBase, TimestampMixin, change_xid_column
 from backend.misc.recurrence import RecurrenceFrequency
 from backend.tools.time_defaults import get_current_time_in_default_timezone
 
@@ -28,6 +30,7 @@ class Recurrence(ORMBase, TimestampMixin):
         Integer,
         ForeignKey("plannable.id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
 
     # Data fields.
@@ -51,6 +54,16 @@ class Recurrence(ORMBase, TimestampMixin):
         nullable=False,
         default=1,
     )
+    # Starts of the occurrences that don't happen (e.g., EXDATEs of imported events).
+    excluded: Mapped[list[datetime] | None] = mapped_column(
+        ARRAY(DateTime(timezone=True)),
+        nullable=True,  # NULL == none.
+    )
+    # IANA zone whose wall-clock time the series keeps (e.g., an imported event's TZID).
+    timezone: Mapped[str | None] = mapped_column(
+        String(),
+        nullable=True,  # NULL == the user's timezone.
+    )
 
     # Relationships.
     # 0..N : 1
@@ -64,7 +77,10 @@ class Tag(ORMBase, TimestampMixin):
     __tablename__ = "tag"
     # Don't allow duplicate tags, i.e. the same (username, name)
     # pairs, where username and name are Tag's columns.
-    __table_args__ = (UniqueConstraint("username", "name"),)
+    __table_args__ = (
+        UniqueConstraint("username", "name"),
+        Index("ix_tag_username_change_xid", "username", "change_xid"),
+    )
 
     # Keys.
     id: Mapped[int] = mapped_column(
@@ -83,6 +99,8 @@ class Tag(ORMBase, TimestampMixin):
         String(),
         nullable=False,
     )
+    # Change token of the sync feed.
+    change_xid: Mapped[int] = change_xid_column()
 
     # Relationships.
     # 0..N : 1
@@ -102,6 +120,8 @@ class Tag(ORMBase, TimestampMixin):
 # NOTE: This is only needed for SQLAlchemy, not to be used directly.
 class PlannableTag(ORMBase):
     __tablename__ = "plannable_tag"
+    # The PK answers "tags of a plannable", this answers "plannables with a tag".
+    __table_args__ = (Index("ix_plannable_tag_tag_id_plannable_id", "tag_id", "plannable_id"),)
 
     # Composite PK.
     plannable_id: Mapped[int] = mapped_column(
@@ -114,3 +134,45 @@ class PlannableTag(ORMBase):
         ForeignKey("tag.id", ondelete="CASCADE"),
         primary_key=True,
     )
+
+
+# Tables whose rows belong to a plannable but have no change token of their own.
+_PLANNABLE_ATTRIBUTE_TABLES = ("recurrence", "plannable_tag")
+
+# Also run by the migration that introduced them. Writing a recurrence or (un)tagging
+# bumps the plannable's change token, so that the sync feed sends it again. Statement-level
+# triggers, so that bulk writes update each plannable once.
+TOUCH_PLANNABLES_SQL = f"""
+CREATE OR REPLACE FUNCTION touch_plannables() RETURNS trigger AS $$
+BEGIN
+    UPDATE plannable SET change_xid = {CURRENT_XID_SQL}
+    WHERE id IN (SELECT plannable_id FROM changed_rows)
+        AND change_xid <> {CURRENT_XID_SQL};
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+""" + "".join(
+    f"""
+CREATE OR REPLACE TRIGGER {table}_touch_{operation} AFTER {operation.upper()} ON {table}
+REFERENCING {rows} TABLE AS changed_rows
+FOR EACH STATEMENT EXECUTE FUNCTION touch_plannables();
+"""
+    for table in _PLANNABLE_ATTRIBUTE_TABLES
+    for operation, rows in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD"))
+)
+
+DROP_TOUCH_PLANNABLES_SQL = (
+    "".join(
+        f"DROP TRIGGER IF EXISTS {table}_touch_{operation} ON {table};\n"
+        for table in _PLANNABLE_ATTRIBUTE_TABLES
+        for operation in ("insert", "update", "delete")
+    )
+    + "DROP FUNCTION IF EXISTS touch_plannables();\n"
+)
+
+# After all tables are created, since the triggers are on other tables.
+sa_event.listen(
+    ORMBase.metadata,
+    "after_create",
+    DDL(TOUCH_PLANNABLES_SQL).execute_if(dialect="postgresql"),
+)
@@ -4,11 +4,22 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Boolean, CheckConstraint, DateTime, ForeignKey, Integer, Interval, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    DDL,
+    Boolean,
+    CheckConstraint,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    Interval,
+    String,
+)
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Mapped, column_property, mapped_column, relationship
 
 from backend.database.constants import EVENT_POLYMORPHIC_IDENTITY, TASK_POLYMORPHIC_IDENTITY
-from backend.database.models.base import ORMBase, TimestampMixin
+from backend.database.models.base import ORMBase, TimestampMixin, change_xid_column
 
 if TYPE_CHECKING:
     from backend.database import ExternalCalendar, Recurrence, Tag, User
@@ -23,6 +34,25 @@ class Plannable(ORMBase, TimestampMixin):
     __mapper_args__ = {
         "polymorphic_on": "type",
     }
+    # Typed loosely, so that subclasses can declare their own indexes.
+    __table_args__: tuple[Index, ...] = (
+        # Every listing/search is scoped to a user, newest first.
+        Index("ix_plannable_username_id", "username", "id"),
+        Index("ix_plannable_username_change_xid", "username", "change_xid"),
+        # Trigram indexes, so that substring search (`ILIKE '%...%'`) doesn't scan the table.
+        Index(
+            "ix_plannable_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_plannable_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+    )
 
     # Keys.
     id: Mapped[int] = mapped_column(
@@ -39,6 +69,7 @@ class Plannable(ORMBase, TimestampMixin):
         Integer,
         ForeignKey("external_calendar.id", ondelete="SET NULL"),
         nullable=True,
+        index=True,
     )
 
     # Discriminator.
@@ -67,6 +98,8 @@ class Plannable(ORMBase, TimestampMixin):
         Boolean,
         nullable=True,  # True for standalone Events.
     )
+    # Change token of the sync feed (Task/Event rows have their own, see below).
+    change_xid: Mapped[int] = change_xid_column()
 
     # Relationships.
     # 0..N : 1
@@ -94,11 +127,25 @@ class Plannable(ORMBase, TimestampMixin):
     )
 
 
+# The trigram indexes above need the `pg_trgm` extension.
+sa_event.listen(
+    Plannable.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
 class Task(Plannable):
     __tablename__ = "task"
     # Correspond to the value of the `type` column specified in the
     # `polymorphic_on` mapper arg in the parent table (Plannable).
     __mapper_args__ = {"polymorphic_identity": TASK_POLYMORPHIC_IDENTITY}  # type: ignore[dict-item]
+    # Task lists are paginated by (deadline, id) per user, and the latest task is looked up by id.
+    __table_args__ = (
+        Index("ix_task_username_deadline_id", "username", "deadline", "id"),
+        Index("ix_task_username_id", "username", "id"),
+        Index("ix_task_username_change_xid", "username", "change_xid"),
+    )
 
     # Keys.
     id: Mapped[int] = mapped_column(
@@ -106,6 +153,15 @@ class Task(Plannable):
         ForeignKey("plannable.id", ondelete="CASCADE"),
         primary_key=True,
     )
+    # Denormalised copy of `plannable.username` for the index above (see `Event.username`).
+    username: Mapped[str] = column_property(
+        mapped_column(
+            String(),
+            ForeignKey("user.username", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        Plannable.username,
+    )
 
     # Data fields.
     deadline: Mapped[datetime] = mapped_column(
@@ -116,6 +172,8 @@ class Task(Plannable):
         Interval,
         nullable=False,
     )
+    # Bumped by updates of the `task` table only (`Plannable.change_xid` by the rest).
+    task_change_xid: Mapped[int] = change_xid_column()
 
     # Relationships.
     # 0/1 : 0..N
@@ -133,6 +191,12 @@ class Event(Plannable):
     __mapper_args__ = {
         "polymorphic_identity": EVENT_POLYMORPHIC_IDENTITY  # type: ignore[dict-item]
     }
+    # Calendar views ask for "all events of a user overlapping [start, end)",
+    # so keep a composite index that answers it without joining `plannable`.
+    __table_args__ = (
+        Index("ix_event_username_start_end", "username", "start", "end"),
+        Index("ix_event_username_change_xid", "username", "change_xid"),
+    )
 
     # Keys.
     id: Mapped[int] = mapped_column(
@@ -145,10 +209,33 @@ class Event(Plannable):
         ForeignKey("task.id", ondelete="CASCADE"),
         nullable=True,
     )
+    # Denormalised copy of `plannable.username`, so that the range index above
+    # can be used. Both columns are mapped to the same attribute, hence
+    # SQLAlchemy keeps them in sync on every ORM insert/update.
+    username: Mapped[str] = column_property(
+        mapped_column(
+            String(),
+            ForeignKey("user.username", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        Plannable.username,
+    )
 
     # Data fields.
     start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     end: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # UID of the VEVENT this event was imported from (if it comes from an ExternalCalendar).
+    external_uid: Mapped[str | None] = mapped_column(
+        String(),
+        nullable=True,
+    )
+    # Fingerprint of the VEVENT's content, so that unchanged events are skipped on sync.
+    external_hash: Mapped[str | None] = mapped_column(
+        String(),
+        nullable=True,
+    )
+    # Bumped by updates of the `event` table only (`Plannable.change_xid` by the rest).
+    event_change_xid: Mapped[int] = change_xid_column()
 
     # Relationships.
     # 0..N : 0/1
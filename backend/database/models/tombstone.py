@@ -0,0 +1,69 @@
+# mypy: disable-error-code="attr-defined, no-redef"
+from __future__ import annotations
+
+from sqlalchemy import DDL, BigInteger, Index, Integer, String
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.database.models.base import ORMBase, change_xid_column
+
+
+class Tombstone(ORMBase):
+    """
+    A deleted plannable or tag, so that the sync feed can tell clients to drop it.
+
+    Rows are written by DB triggers (see below), so that deletes cascading
+    in the DB (e.g., from a user or a task) are recorded as well.
+    """
+
+    __tablename__ = "tombstone"
+    __table_args__ = (Index("ix_tombstone_username_change_xid", "username", "change_xid"),)
+
+    # Keys.
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+    )
+    # NOTE: No FK, tombstones outlive the rows (and users) they refer to.
+    username: Mapped[str] = mapped_column(
+        String(),
+        nullable=False,
+    )
+
+    # Data fields.
+    # Table of the deleted row, i.e. "plannable" or "tag".
+    table_name: Mapped[str] = mapped_column(
+        String(),
+        nullable=False,
+    )
+    row_id: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+    )
+    change_xid: Mapped[int] = change_xid_column()
+
+
+# Also run by the migration that introduced tombstones.
+RECORD_TOMBSTONE_SQL = """
+CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO tombstone (username, table_name, row_id)
+    VALUES (OLD.username, TG_TABLE_NAME, OLD.id);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER plannable_tombstone AFTER DELETE ON plannable
+FOR EACH ROW EXECUTE FUNCTION record_tombstone();
+
+CREATE OR REPLACE TRIGGER tag_tombstone AFTER DELETE ON tag
+FOR EACH ROW EXECUTE FUNCTION record_tombstone();
+"""
+
+# After all tables are created, since the triggers are on other tables.
+sa_event.listen(
+    ORMBase.metadata,
+    "after_create",
+    DDL(RECORD_TOMBSTONE_SQL).execute_if(dialect="postgresql"),
+)
@@ -4,14 +4,12 @@ from __future__ import annotations
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, String
-
-# TODO: Use JSONB instead of JSON
-# from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.database.models.base import ORMBase, TimestampMixin
-from backend.misc.defaults import DefaultUserSettings
+from backend.misc.defaults import DefaultModelParameters, DefaultUserSettings
 
 if TYPE_CHECKING:
     from backend.database import ExternalCalendar, Plannable, Tag
@@ -113,6 +111,10 @@ class UserSettings(ORMBase, TimestampMixin):
 
 class UserModelParameters(ORMBase, TimestampMixin):
     __tablename__ = "user_model_parameters"
+    __table_args__ = (
+        # Lets users be found by parameter (`@>` containment, `?` key existence).
+        Index("ix_user_model_parameters_parameters", "parameters", postgresql_using="gin"),
+    )
 
     # Keys.
     username: Mapped[str] = mapped_column(
@@ -122,10 +124,15 @@ class UserModelParameters(ORMBase, TimestampMixin):
     )
 
     # Data fields.
+    # JSONB, so that single keys can be read/set in the DB without the whole document.
     parameters: Mapped[dict] = mapped_column(
-        # TODO: Use JSONB instead of JSON
-        JSON,
+        JSONB,
+        nullable=False,
+    )
+    schema_version: Mapped[int] = mapped_column(
+        Integer,
         nullable=False,
+        default=DefaultModelParameters.schema_version,
     )
 
     # Relationships.
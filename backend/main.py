@@ -4,11 +4,15 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from backend.database.db_session import SessionLocal, engine
-from backend.database.models.base import ORMBase
+from backend.database.db_session import SessionLocal, async_engine, engine
+from backend.misc.config import CALENDAR_SYNC_ENABLED, CHANGE_FEED_ENABLED, INSTRUMENTATION_ENABLED
 from backend.misc.logger import configure_logging, get_logger
-from backend.routers import events, tasks, users
+from backend.routers import calendars, debug, events, plannables, sync, tasks, users
+from backend.services.calendar_sync import calendar_sync_worker
+from backend.services.change_feed import change_hub, change_source
 from backend.services.startup import startup
+from backend.tools.instrumentation import InstrumentationMiddleware, instrument_engine
+from backend.tools.jsonify import ORJSONResponse
 
 # TODO:
 # - Docstrings enforcement.
@@ -23,21 +27,30 @@ log = get_logger(__name__)
 async def lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
     log.warning("Starting up application.")
 
-    # TODO: Switch to using Alembic in the future.
-    # ORMBase.metadata.drop_all(bind=engine)
-    ORMBase.metadata.create_all(bind=engine)
-
+    # The schema is managed by migrations, run out of band (see backend/alembic.ini),
+    # so booting doesn't inspect any table.
     with SessionLocal() as db:
         startup(db)
 
+    # Runs in the background, so startup doesn't wait for any calendar.
+    if CALENDAR_SYNC_ENABLED:
+        calendar_sync_worker.start()
+    # Fans the DB's change notifications out to the clients streaming them (see routers/sync.py).
+    if CHANGE_FEED_ENABLED:
+        change_source.start(change_hub)
+
     # ↑ STARTUP CODE ↑
     yield  # App runs.
     # ↓ SHUTDOWN CODE ↓
 
     log.info("Shutting down application.")
+    await calendar_sync_worker.stop()
+    await change_source.stop()
+    await async_engine.dispose()
 
 
-app = FastAPI(lifespan=lifespan)
+# orjson renders responses (incl. datetimes) considerably faster than the stdlib encoder.
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Allow requests from the frontend.
 app.add_middleware(
@@ -46,14 +59,26 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],  # Allow all HTTP methods (GET, POST, etc.)
     allow_headers=["*"],
+    # Let the frontend read the timings of cross-origin requests.
+    expose_headers=["Server-Timing"] if INSTRUMENTATION_ENABLED else [],
 )
 
+# Added last, so that it wraps the other middlewares too.
+if INSTRUMENTATION_ENABLED:
+    instrument_engine(engine)
+    instrument_engine(async_engine)
+    app.add_middleware(InstrumentationMiddleware)
+
 
 def run_app() -> FastAPI:
     routers = [
         (users.router, "/users", ["Users"]),
         (tasks.router, "/tasks", ["Tasks"]),
         (events.router, "/events", ["Events"]),
+        (plannables.router, "/plannables", ["Plannables"]),
+        (calendars.router, "/calendars", ["Calendars"]),
+        (sync.router, "/sync", ["Sync"]),
+        (debug.router, "/debug", ["Debug"]),
     ]
     for router, prefix, tags in routers:
         app.include_router(
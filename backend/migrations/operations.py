@@ -0,0 +1,44 @@
+from collections.abc import Sequence
+from typing import Any
+
+import sqlalchemy as sa
+from alembic import op
+
+
+def create_index_concurrently(
+    name: str,
+    table: str,
+    columns: Sequence[str],
+    **kwargs: Any,
+) -> None:
+    """
+    Build an index without locking the table against writes (`CREATE INDEX CONCURRENTLY`).
+
+    The build can't run in a transaction, so it's committed on its own. A
+    build that failed half-way leaves an INVALID index behind, which is
+    dropped and rebuilt; a valid existing index is kept as is.
+    """
+    context = op.get_context()
+    if not context.as_sql:
+        invalid = op.get_bind().scalar(
+            sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+            {"name": name},
+        )
+        if invalid:
+            drop_index_concurrently(name, table)
+
+    with context.autocommit_block():
+        op.create_index(
+            name,
+            table,
+            list(columns),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+            **kwargs,
+        )
+
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    """Drop an index without locking the table against reads and writes."""
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,43 @@
+"""
+Sync state of external calendars, and the UID/fingerprint of imported events.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-20 09:10:00.000000+00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# Revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Nullable columns without defaults, so adding them doesn't rewrite the tables.
+_CALENDAR_COLUMNS: dict[str, sa.types.TypeEngine] = {
+    "url": sa.String(),
+    "etag": sa.String(),
+    "last_modified": sa.String(),
+    "content_hash": sa.String(),
+    "last_synced_at": sa.DateTime(timezone=True),
+}
+_EVENT_COLUMNS: dict[str, sa.types.TypeEngine] = {
+    "external_uid": sa.String(),
+    "external_hash": sa.String(),
+}
+
+
+def upgrade() -> None:
+    for name, type_ in _CALENDAR_COLUMNS.items():
+        op.add_column("external_calendar", sa.Column(name, type_, nullable=True))
+    for name, type_ in _EVENT_COLUMNS.items():
+        op.add_column("event", sa.Column(name, type_, nullable=True))
+
+
+def downgrade() -> None:
+    for name in _EVENT_COLUMNS:
+        op.drop_column("event", name)
+    for name in _CALENDAR_COLUMNS:
+        op.drop_column("external_calendar", name)
@@ -0,0 +1,73 @@
+"""
+Copy `plannable.username` into `event` and `task`, for their per-user indexes.
+
+The columns are backfilled in batches (each committed on its own), and made
+NOT NULL through a validated CHECK constraint, so that no step holds a lock
+that blocks writes while it scans the table.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-10-20 09:20:00.000000+00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# Revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+_TABLES = ("event", "task")
+# Rows updated per backfill transaction.
+_BATCH_SIZE = 10_000
+
+
+def upgrade() -> None:
+    context = op.get_context()
+    for table in _TABLES:
+        op.add_column(table, sa.Column("username", sa.String(), nullable=True))
+
+    for table in _TABLES:
+        backfill = sa.text(
+            f"""
+            UPDATE {table} SET username = plannable.username
+            FROM plannable
+            WHERE plannable.id = {table}.id
+              AND {table}.id IN (SELECT id FROM {table} WHERE username IS NULL LIMIT :limit)
+            """
+        )
+        with context.autocommit_block():
+            if context.as_sql:
+                op.execute(backfill.bindparams(limit=None))
+            else:
+                while op.get_bind().execute(backfill, {"limit": _BATCH_SIZE}).rowcount:
+                    pass
+
+    for table in _TABLES:
+        # NOT VALID constraints are added without scanning the table.
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_username_fkey FOREIGN KEY (username) "
+            'REFERENCES "user" (username) ON DELETE CASCADE NOT VALID'
+        )
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_username_not_null "
+            "CHECK (username IS NOT NULL) NOT VALID"
+        )
+
+    # Validating doesn't block writes, as long as the locks taken above are released first.
+    with context.autocommit_block():
+        for table in _TABLES:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_username_fkey")
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_username_not_null")
+
+    for table in _TABLES:
+        # Skips the scan, since the validated CHECK already proves there are no NULLs.
+        op.alter_column(table, "username", nullable=False)
+        op.drop_constraint(f"{table}_username_not_null", table, type_="check")
+
+
+def downgrade() -> None:
+    for table in _TABLES:
+        op.drop_column(table, "username")
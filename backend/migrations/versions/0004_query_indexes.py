@@ -0,0 +1,53 @@
+"""
+Indexes of the per-user listings, tag/text search and calendar lookups.
+
+All of them are built CONCURRENTLY, so existing tables stay writable meanwhile.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-10-20 09:30:00.000000+00:00
+"""
+
+from alembic import op
+
+from backend.migrations.operations import create_index_concurrently, drop_index_concurrently
+
+# Revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, extra `create_index` arguments)
+_INDEXES: list[tuple[str, str, list[str], dict]] = [
+    ("ix_event_username_start_end", "event", ["username", "start", "end"], {}),
+    ("ix_task_username_deadline_id", "task", ["username", "deadline", "id"], {}),
+    ("ix_task_username_id", "task", ["username", "id"], {}),
+    ("ix_plannable_username_id", "plannable", ["username", "id"], {}),
+    ("ix_plannable_external_calendar_id", "plannable", ["external_calendar_id"], {}),
+    (
+        "ix_plannable_title_trgm",
+        "plannable",
+        ["title"],
+        {"postgresql_using": "gin", "postgresql_ops": {"title": "gin_trgm_ops"}},
+    ),
+    (
+        "ix_plannable_description_trgm",
+        "plannable",
+        ["description"],
+        {"postgresql_using": "gin", "postgresql_ops": {"description": "gin_trgm_ops"}},
+    ),
+    ("ix_plannable_tag_tag_id_plannable_id", "plannable_tag", ["tag_id", "plannable_id"], {}),
+    ("ix_recurrence_plannable_id", "recurrence", ["plannable_id"], {}),
+]
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, columns, kwargs in _INDEXES:
+        create_index_concurrently(name, table, columns, **kwargs)
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(_INDEXES):
+        drop_index_concurrently(name, table)
@@ -0,0 +1,56 @@
+"""
+Store model parameters as JSONB (with a GIN index), and version their layout.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-10-20 09:40:00.000000+00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import JSONB
+
+from backend.migrations.operations import create_index_concurrently, drop_index_concurrently
+
+# Revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rewrites the table, which is fine as it holds (at most) one small row per user.
+    op.alter_column(
+        "user_model_parameters",
+        "parameters",
+        type_=JSONB(),
+        existing_nullable=False,
+        postgresql_using="parameters::jsonb",
+    )
+    # A constant default only touches the catalog, existing rows aren't rewritten.
+    op.add_column(
+        "user_model_parameters",
+        sa.Column("schema_version", sa.Integer(), server_default="1", nullable=False),
+    )
+    # New rows get theirs from the app (see DefaultModelParameters).
+    op.alter_column("user_model_parameters", "schema_version", server_default=None)
+
+    create_index_concurrently(
+        "ix_user_model_parameters_parameters",
+        "user_model_parameters",
+        ["parameters"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    drop_index_concurrently("ix_user_model_parameters_parameters", "user_model_parameters")
+    op.drop_column("user_model_parameters", "schema_version")
+    op.alter_column(
+        "user_model_parameters",
+        "parameters",
+        type_=sa.JSON(),
+        existing_nullable=False,
+        postgresql_using="parameters::json",
+    )
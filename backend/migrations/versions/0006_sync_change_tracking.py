@@ -0,0 +1,67 @@
+"""
+Change tokens and tombstones for the sync feed.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-10-21 09:00:00.000000+00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from backend.database.models.base import CURRENT_XID_SQL
+from backend.database.models.tombstone import RECORD_TOMBSTONE_SQL
+from backend.migrations.operations import create_index_concurrently, drop_index_concurrently
+
+# Revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+_TABLES = ("plannable", "task", "event", "tag")
+
+
+def upgrade() -> None:
+    for table in _TABLES:
+        # A constant default doesn't rewrite the table. Existing rows get 0, i.e. they
+        # changed before any token, and are only sent to clients that sync from scratch.
+        op.add_column(
+            table,
+            sa.Column("change_xid", sa.BigInteger(), server_default="0", nullable=False),
+        )
+        op.alter_column(table, "change_xid", server_default=sa.text(f"({CURRENT_XID_SQL})"))
+
+    op.create_table(
+        "tombstone",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("table_name", sa.String(), nullable=False),
+        sa.Column("row_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "change_xid",
+            sa.BigInteger(),
+            server_default=sa.text(f"({CURRENT_XID_SQL})"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tombstone_username_change_xid", "tombstone", ["username", "change_xid"])
+    op.execute(RECORD_TOMBSTONE_SQL)
+
+    for table in _TABLES:
+        create_index_concurrently(
+            f"ix_{table}_username_change_xid", table, ["username", "change_xid"]
+        )
+
+
+def downgrade() -> None:
+    for table in _TABLES:
+        drop_index_concurrently(f"ix_{table}_username_change_xid", table)
+
+    op.execute("DROP TRIGGER IF EXISTS tag_tombstone ON tag")
+    op.execute("DROP TRIGGER IF EXISTS plannable_tombstone ON plannable")
+    op.execute("DROP FUNCTION IF EXISTS record_tombstone()")
+    op.drop_table("tombstone")
+    for table in _TABLES:
+        op.drop_column(table, "change_xid")
@@ -0,0 +1,25 @@
+"""
+Notify listeners of changed plannables, for the pushed change feed.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2025-10-24 09:00:00.000000+00:00
+"""
+
+from alembic import op
+
+from backend.database.change_notifications import DROP_NOTIFY_CHANGES_SQL, NOTIFY_CHANGES_SQL
+
+# Revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(NOTIFY_CHANGES_SQL)
+
+
+def downgrade() -> None:
+    op.execute(DROP_NOTIFY_CHANGES_SQL)
@@ -0,0 +1,37 @@
+"""
+Time booked per user and local day, maintained by triggers.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2025-10-27 09:00:00.000000+00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from backend.database.models.daily_load import DROP_DAILY_LOAD_SQL, MAINTAIN_DAILY_LOAD_SQL
+
+# Revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_load",
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("booked", sa.Interval(), nullable=False),
+        sa.ForeignKeyConstraint(["username"], ["user.username"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("username", "day"),
+    )
+    op.execute(MAINTAIN_DAILY_LOAD_SQL)
+    # Existing events, aggregated once (in this transaction, so no write is missed).
+    op.execute('SELECT rebuild_daily_load(username) FROM "user"')
+
+
+def downgrade() -> None:
+    op.execute(DROP_DAILY_LOAD_SQL)
+    op.drop_table("daily_load")
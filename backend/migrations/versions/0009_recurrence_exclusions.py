@@ -0,0 +1,28 @@
+"""
+Occurrences excluded from recurring series (e.g., EXDATEs of imported events).
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2025-10-28 09:00:00.000000+00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# Revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "recurrence",
+        sa.Column("excluded", postgresql.ARRAY(sa.DateTime(timezone=True)), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("recurrence", "excluded")
@@ -0,0 +1,35 @@
+"""
+Background sync schedule of external calendars (failures and next sync), shared by workers.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2025-10-28 10:00:00.000000+00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# Revision identifiers, used by Alembic.
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A constant default only touches the catalog, existing rows aren't rewritten.
+    op.add_column(
+        "external_calendar",
+        sa.Column("failure_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    # New rows get theirs from the app (see ExternalCalendar).
+    op.alter_column("external_calendar", "failure_count", server_default=None)
+    op.add_column(
+        "external_calendar",
+        sa.Column("next_sync_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("external_calendar", "next_sync_at")
+    op.drop_column("external_calendar", "failure_count")
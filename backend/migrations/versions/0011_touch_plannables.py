@@ -0,0 +1,28 @@
+"""
+Bump the change token of plannables whose recurrence or tags are written.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2025-10-28 11:00:00.000000+00:00
+"""
+
+from alembic import op
+
+from backend.database.models.plannable_attributes import (
+    DROP_TOUCH_PLANNABLES_SQL,
+    TOUCH_PLANNABLES_SQL,
+)
+
+# Revision identifiers, used by Alembic.
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(TOUCH_PLANNABLES_SQL)
+
+
+def downgrade() -> None:
+    op.execute(DROP_TOUCH_PLANNABLES_SQL)
@@ -0,0 +1,24 @@
+"""
+Timezone of recurring series (e.g., the TZID of imported events), instead of always the user's.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2025-10-28 12:00:00.000000+00:00
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# Revision identifiers, used by Alembic.
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("recurrence", sa.Column("timezone", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("recurrence", "timezone")
@@ -8,6 +8,43 @@ load_dotenv()
 API_KEY = os.getenv("OPENAI_API_KEY")
 DATETIME_FORMAT = "%Y-%m-%dT%H:%M"
 
+# Background sync of external calendars (see services/calendar_sync.py).
+CALENDAR_SYNC_ENABLED = os.getenv("CALENDAR_SYNC_ENABLED", "true").lower() in ("1", "true", "yes")
+# Seconds between two syncs of the same calendar.
+CALENDAR_SYNC_INTERVAL = int(os.getenv("CALENDAR_SYNC_INTERVAL", "900"))
+# Seconds between two checks for calendars that are due.
+CALENDAR_SYNC_POLL_INTERVAL = int(os.getenv("CALENDAR_SYNC_POLL_INTERVAL", "30"))
+# Max number of calendars synced at the same time (per worker process).
+CALENDAR_SYNC_CONCURRENCY = int(os.getenv("CALENDAR_SYNC_CONCURRENCY", "8"))
+# Max random delay (in seconds) before each sync, so that syncs don't come in bursts.
+CALENDAR_SYNC_JITTER = float(os.getenv("CALENDAR_SYNC_JITTER", "10"))
+
+# Cache of user settings and model parameters (see services/user_settings.py).
+# A `redis://` URL shares it between processes, otherwise each process has its own.
+USER_CACHE_URL = os.getenv("USER_CACHE_URL", "")
+# Seconds before a cached entry is reloaded (even if it wasn't invalidated).
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+# Max number of entries kept by the in-process cache.
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+
+# Push of calendar changes to clients (see services/change_feed.py).
+CHANGE_FEED_ENABLED = os.getenv("CHANGE_FEED_ENABLED", "true").lower() in ("1", "true", "yes")
+# Seconds to wait after a change for the rest of its burst, so that it's sent as one message.
+CHANGE_FEED_COALESCE = float(os.getenv("CHANGE_FEED_COALESCE", "0.2"))
+# Seconds without changes after which a keep-alive is sent (below proxies' idle timeouts).
+CHANGE_FEED_HEARTBEAT = float(os.getenv("CHANGE_FEED_HEARTBEAT", "15"))
+
+# Per-request timings (`Server-Timing` headers and /debug/metrics, see tools/instrumentation.py).
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# Sampling profiler at /debug/profile. Exposes code internals, so keep it off in production.
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+# Longest profile that can be taken at once (in seconds).
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "30"))
+
 logging_config = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from datetime import time, timedelta
 
 from backend.misc.user_settings import Theme
 
@@ -7,3 +8,30 @@ from backend.misc.user_settings import Theme
 class DefaultUserSettings:
     timezone: str = "Europe/London"
     theme: Theme = Theme.LIGHT
+
+
+@dataclass(frozen=True)
+class DefaultModelParameters:
+    # Layout version of `user_model_parameters.parameters`. Bump it (and register an
+    # upgrade in services/user_settings.py) whenever keys are renamed or restructured.
+    schema_version: int = 1
+
+
+@dataclass(frozen=True)
+class DefaultSchedulerSettings:
+    # Task events are only placed within these local hours.
+    working_hours_start: time = time(9, 0)
+    working_hours_end: time = time(21, 0)
+    # Don't create events shorter than this (unless less time is left to schedule).
+    min_chunk: timedelta = timedelta(minutes=30)
+    # Prefer spreading long tasks across several free slots instead of one long event.
+    max_chunk: timedelta = timedelta(hours=2)
+    # Days already booked for this long only get new task events if nothing else fits.
+    max_daily_load: timedelta = timedelta(hours=8)
+
+
+@dataclass(frozen=True)
+class DefaultPagination:
+    page_size: int = 100
+    # Larger pages are refused, so that one request can't load a whole history.
+    max_page_size: int = 500
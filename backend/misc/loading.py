@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+# Relationships of a Plannable that list endpoints can include (`?include=tags`).
+class PlannableRelation(str, Enum):
+    TAGS = "tags"
+    RECURRENCE = "recurrence"
+    EXTERNAL_CALENDAR = "external_calendar"
+    # Only for tasks.
+    EVENTS = "events"
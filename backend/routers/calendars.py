@@ -0,0 +1,68 @@
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import AsyncDBSession, ExternalCalendar
+from backend.schemas.calendars import (
+    CalendarSyncResponse,
+    ExternalCalendarCreate,
+    ExternalCalendarResponse,
+)
+from backend.services.external_calendars import (
+    create_external_calendar,
+    import_calendar,
+    sync_calendar,
+)
+
+# Bytes read from an uploaded file at a time.
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+router = APIRouter()
+
+
+@router.post("/", response_model=ExternalCalendarResponse)
+async def create_calendar(
+    db: AsyncDBSession,
+    request: ExternalCalendarCreate,
+) -> ExternalCalendarResponse:
+    """Subscribe a user to an external calendar."""
+    calendar = await create_external_calendar(db, request.username, request.provider, request.url)
+    return ExternalCalendarResponse.model_validate(calendar)
+
+
+@router.post("/{calendar_id}/sync", response_model=CalendarSyncResponse)
+async def sync_from_url(db: AsyncDBSession, calendar_id: int) -> CalendarSyncResponse:
+    """Sync the calendar with its .ics feed, writing only the events that changed."""
+    calendar = await _get_calendar(db, calendar_id)
+    if calendar.url is None:
+        raise HTTPException(status_code=400, detail="Calendar has no URL.")
+
+    result = await sync_calendar(db, calendar)
+    return CalendarSyncResponse.model_validate(result)
+
+
+@router.post("/{calendar_id}/upload", response_model=CalendarSyncResponse)
+async def sync_from_file(
+    db: AsyncDBSession,
+    calendar_id: int,
+    file: UploadFile,
+) -> CalendarSyncResponse:
+    """Sync the calendar with an uploaded .ics file, reading it in chunks."""
+    calendar = await _get_calendar(db, calendar_id)
+
+    async def read_chunks() -> AsyncIterator[bytes]:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+    result = await import_calendar(db, calendar, read_chunks())
+    # The events no longer match the feed's last sync, so the next one mustn't be skipped.
+    calendar.etag = calendar.last_modified = calendar.content_hash = None
+    return CalendarSyncResponse.model_validate(result)
+
+
+async def _get_calendar(db: AsyncSession, calendar_id: int) -> ExternalCalendar:
+    calendar = await db.get(ExternalCalendar, calendar_id)
+    if calendar is None:
+        raise HTTPException(status_code=404, detail="Calendar not found.")
+    return calendar
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from backend.misc.config import INSTRUMENTATION_ENABLED, PROFILER_ENABLED, PROFILER_MAX_SECONDS
+from backend.tools.instrumentation import request_metrics
+from backend.tools.sampling_profiler import sample_stacks
+
+router = APIRouter()
+
+# Only one profile at a time, so that profiles don't sample each other.
+_profiling = asyncio.Lock()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Return the request metrics of this worker process, in the Prometheus text format."""
+    if not INSTRUMENTATION_ENABLED:
+        raise HTTPException(status_code=404, detail="Instrumentation is disabled.")
+    return PlainTextResponse(
+        request_metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(default=10, gt=0, le=PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(default=5, ge=1, le=1000),
+) -> PlainTextResponse:
+    """
+    Sample what this worker's event loop runs for `seconds` (while other requests
+    are being handled), and return how often each stack was seen, most frequent
+    first, in the "folded" format of flame graph tools (e.g., speedscope).
+    """
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="The profiler is disabled.")
+    if _profiling.locked():
+        raise HTTPException(status_code=400, detail="A profile is already being taken.")
+
+    async with _profiling:
+        # Handlers run on the event loop's thread, which is sampled from another one.
+        stacks = await asyncio.to_thread(
+            sample_stacks, threading.get_ident(), seconds, interval_ms / 1000
+        )
+
+    return PlainTextResponse("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
@@ -1,29 +1,123 @@
-from fastapi import APIRouter
+from datetime import datetime
 
-from backend.database import DBSession
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+
+from backend.database import AsyncDBSession
+from backend.misc.loading import PlannableRelation
+from backend.schemas.events import EventCreate, EventDetailResponse, EventMove, EventResponse
+from backend.schemas.pagination import PageParams
+from backend.services import events as event_service
+from backend.services.events import EventRow
+from backend.tools.jsonify import ORJSONResponse, rows_to_dicts
 
 router = APIRouter()
 
 
-@router.get("/list_from_task/{task_id}")
-def list_events_from_task(db: DBSession, task_id: int) -> None:
+@router.get("/list_from_task/{task_id}", response_class=ORJSONResponse)
+async def list_events_from_task(db: AsyncDBSession, task_id: int) -> ORJSONResponse:
     """Return all events linked to a given task."""
-    db = db
-    task_id = task_id
-    raise NotImplementedError
+    events = await event_service.get_events_from_task(db, task_id)
+    return ORJSONResponse({"events": rows_to_dicts(EventRow._fields, events)})
+
+
+@router.get("/list_all_from_user/{username}", response_class=ORJSONResponse)
+async def list_all_events_from_user(
+    db: AsyncDBSession,
+    username: str,
+    include: list[PlannableRelation] = Query(default=[]),
+    page: PageParams = Depends(PageParams.as_query),
+) -> ORJSONResponse:
+    """
+    Return a page of the user's stored events (recurring ones are not expanded),
+    with the relationships in `include` (if any).
+    """
+    if not include:
+        events = await event_service.get_all_events(db, username, page.after, page.limit)
+        return ORJSONResponse(
+            {
+                "events": rows_to_dicts(EventRow._fields, events),
+                "next_cursor": page.next_cursor(events, "start"),
+            }
+        )
+
+    if PlannableRelation.EVENTS in include:
+        raise HTTPException(status_code=400, detail="Events can't include `events`.")
+
+    detailed = await event_service.get_all_event_details(
+        db, username, include, page.after, page.limit
+    )
+    payload = [EventDetailResponse.from_event(event, include).model_dump() for event in detailed]
+    return ORJSONResponse({"events": payload, "next_cursor": page.next_cursor(detailed, "start")})
+
+
+@router.get("/list_from_user/{username}", response_class=ORJSONResponse)
+async def list_events_from_user(
+    db: AsyncDBSession,
+    username: str,
+    start: datetime,
+    end: datetime,
+    page: PageParams = Depends(PageParams.as_query),
+) -> ORJSONResponse:
+    """
+    Return a page of the user's events (incl. recurring occurrences)
+    overlapping [start, end), ordered by start.
+    """
+    if end <= start:
+        raise HTTPException(status_code=400, detail="`end` must be after `start`.")
+
+    events = await event_service.list_event_occurrences(
+        db, username, start, end, page.after, page.limit
+    )
+    return ORJSONResponse(
+        {
+            "events": rows_to_dicts(EventRow._fields, events),
+            "next_cursor": page.next_cursor(events, "start"),
+        }
+    )
+
+
+@router.delete("/delete_all_from_task/{task_id}", response_model=list[int])
+async def delete_events_from_task(db: AsyncDBSession, task_id: int) -> list[int]:
+    """Delete all events associated with a task and return their IDs."""
+    return await event_service.delete_events_from_task(db, task_id)
+
+
+@router.post("/create_many/{username}", response_model=list[EventResponse])
+async def create_events(
+    db: AsyncDBSession,
+    username: str,
+    events: list[EventCreate],
+) -> list[EventResponse]:
+    """Create many standalone events at once (in the given order)."""
+    _check_times(events)
+    created = await event_service.create_events(db, username, events)
+    if created is None:
+        raise HTTPException(status_code=404, detail="User not found.")
+    return [EventResponse.model_validate(event) for event in created]
+
+
+@router.patch("/move_many/{username}", response_model=list[EventResponse])
+async def move_events(
+    db: AsyncDBSession,
+    username: str,
+    moves: list[EventMove],
+) -> list[EventResponse]:
+    """Move many of the user's events at once (e.g., a dragged week) and return them."""
+    _check_times(moves)
+    moved = await event_service.move_events(db, username, moves)
+    return [EventResponse.model_validate(row) for row in moved]
 
 
-@router.get("/list_from_user/{username}")
-def list_events_from_user(db: DBSession, username: str) -> None:
-    """Return all events belonging to a given user."""
-    db = db
-    username = username
-    raise NotImplementedError
+@router.delete("/delete_many/{username}", response_model=list[int])
+async def delete_events(
+    db: AsyncDBSession,
+    username: str,
+    event_ids: list[int] = Body(...),
+) -> list[int]:
+    """Delete many of the user's events at once and return the IDs actually deleted."""
+    return await event_service.delete_events(db, username, event_ids)
 
 
-@router.delete("/delete_all_from_task/{task_id}")
-def delete_events_from_task(db: DBSession, task_id: int) -> None:
-    """Delete all events associated with a task."""
-    db = db
-    task_id = task_id
-    raise NotImplementedError
+def _check_times(events: list[EventCreate] | list[EventMove]) -> None:
+    if any(event.end < event.start for event in events):
+        raise HTTPException(status_code=400, detail="`end` must not be before `start`.")
@@ -0,0 +1,41 @@
+from typing import Literal
+
+from fastapi import APIRouter, Query
+
+from backend.database import AsyncDBSession
+from backend.services.plannables import SEARCH_LIMIT, PlannableRow, search_plannables
+from backend.tools.jsonify import ORJSONResponse, rows_to_dicts
+
+router = APIRouter()
+
+
+@router.get("/search/{username}", response_class=ORJSONResponse)
+async def search(
+    db: AsyncDBSession,
+    username: str,
+    all_tags: list[str] = Query(default=[]),
+    any_tags: list[str] = Query(default=[]),
+    no_tags: list[str] = Query(default=[]),
+    text: str | None = Query(default=None, min_length=1),
+    priority: list[int] = Query(default=[]),
+    is_completed: bool | None = None,
+    plannable_type: Literal["task", "event"] | None = Query(default=None, alias="type"),
+    limit: int = Query(default=100, ge=1, le=SEARCH_LIMIT),
+) -> ORJSONResponse:
+    """
+    Search the user's tasks and events by tags (all/any/none of), text,
+    priority and completion. Returns the newest matches first.
+    """
+    rows = await search_plannables(
+        db,
+        username,
+        all_tags=all_tags,
+        any_tags=any_tags,
+        no_tags=no_tags,
+        text=text,
+        priorities=priority,
+        is_completed=is_completed,
+        plannable_type=plannable_type,
+        limit=limit,
+    )
+    return ORJSONResponse({"plannables": rows_to_dicts(PlannableRow._fields, rows)})
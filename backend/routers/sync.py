@@ -0,0 +1,76 @@
+from collections.abc import AsyncIterator
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from backend.database import AsyncDBSession
+from backend.misc.config import CHANGE_FEED_ENABLED
+from backend.services.change_feed import RESYNC, change_hub
+from backend.services.events import EventRow
+from backend.services.sync import TagRow, get_changes
+from backend.services.tasks import TaskRow
+from backend.tools.jsonify import ORJSONResponse, rows_to_dicts, to_minutes
+
+router = APIRouter()
+
+
+@router.get("/{username}", response_class=ORJSONResponse)
+async def sync(
+    db: AsyncDBSession,
+    username: str,
+    since: int | None = Query(default=None, ge=0),
+) -> ORJSONResponse:
+    """
+    Return the user's tasks, events and tags changed since the `token` of a previous
+    call, and the IDs of the deleted ones. Without `since`, return all of them.
+
+    Clients should upsert the rows (the same change can be sent twice), drop the
+    deleted IDs, and pass the returned `token` as `since` next time.
+    """
+    delta = await get_changes(db, username, since)
+    return ORJSONResponse(
+        {
+            "token": delta.token,
+            # Durations are in minutes, like in `TaskResponse`.
+            "tasks": rows_to_dicts(TaskRow._fields, delta.tasks, {"duration": to_minutes}),
+            "events": rows_to_dicts(EventRow._fields, delta.events),
+            "tags": rows_to_dicts(TagRow._fields, delta.tags),
+            "deleted": {"plannables": delta.deleted_plannables, "tags": delta.deleted_tags},
+        }
+    )
+
+
+@router.get("/{username}/stream", response_class=StreamingResponse)
+async def stream_changes(username: str) -> StreamingResponse:
+    """
+    Server-sent events telling when the user's calendar changes, so that clients
+    call the sync endpoint then, instead of polling it.
+
+    Each `change` event lists the changed tables (`plannable`, `task`, `event`), or
+    `*` if changes may have been missed. Bursts of changes are sent as one event,
+    and a comment is sent every so often to keep idle connections open.
+    """
+    if not CHANGE_FEED_ENABLED:
+        raise HTTPException(status_code=404, detail="The change feed is disabled.")
+
+    async def messages() -> AsyncIterator[bytes]:
+        subscription = change_hub.subscribe(username)
+        try:
+            # Until then, clients can't tell what changed since their last sync.
+            yield _change_message({RESYNC})
+            async for tables in subscription.changes():
+                yield _change_message(tables) if tables else b": keep-alive\n\n"
+        finally:
+            change_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        messages(),
+        media_type="text/event-stream",
+        # Stop proxies (e.g., nginx) from buffering or caching the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _change_message(tables: set[str]) -> bytes:
+    return b"event: change\ndata: " + orjson.dumps({"tables": sorted(tables)}) + b"\n\n"
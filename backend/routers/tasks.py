@@ -1,7 +1,24 @@
-from fastapi import APIRouter, Depends
+from typing import Any
 
-from backend.database import DBSession
-from backend.schemas.tasks import TaskCreateForm, TaskUpdateForm
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from backend.database import AsyncDBSession
+from backend.misc.loading import PlannableRelation
+from backend.schemas.events import EventResponse
+from backend.schemas.pagination import PageParams
+from backend.schemas.tasks import (
+    RescheduledTaskResponse,
+    ScheduleDiffResponse,
+    ScheduledTaskResponse,
+    TaskCreate,
+    TaskCreateForm,
+    TaskDetailResponse,
+    TaskResponse,
+    TaskUpdateForm,
+)
+from backend.services import tasks as task_service
+from backend.services.tasks import TaskRow
+from backend.tools.jsonify import ORJSONResponse, rows_to_dicts, to_minutes
 
 # TODO: Createa an int-backed Enum class instead.
 PRIORITY_LOW = 0
@@ -11,49 +28,98 @@ PRIORITY_HIGH = 2
 router = APIRouter()
 
 
-@router.post("/")
-def create_task(
-    db: DBSession,
+@router.post("/", response_model=ScheduledTaskResponse)
+async def create_task(
+    db: AsyncDBSession,
     form_data: TaskCreateForm = Depends(TaskCreateForm.as_form),
-) -> None:
+) -> ScheduledTaskResponse:
     """Create a new task, save it in the database, and schedule events for it."""
-    db = db
-    form_data = form_data
-    raise NotImplementedError
+    task, events = await task_service.create_task(db, form_data)
+    return ScheduledTaskResponse(
+        task=TaskResponse.from_task(task),
+        events=[EventResponse.model_validate(event) for event in events],
+    )
+
 
+@router.post("/create_many/{username}", response_model=list[ScheduledTaskResponse])
+async def create_tasks(
+    db: AsyncDBSession,
+    username: str,
+    tasks: list[TaskCreate],
+) -> list[ScheduledTaskResponse]:
+    """
+    Create many tasks at once (e.g., an imported project plan) and schedule them
+    together, so that they don't compete for the same free time.
+    """
+    created = await task_service.create_tasks(db, username, tasks)
+    return [
+        ScheduledTaskResponse(
+            task=TaskResponse.from_task(task),
+            events=[EventResponse.model_validate(event) for event in events],
+        )
+        for task, events in created
+    ]
 
-@router.put("/{taskID}")
-def update_task(
-    db: DBSession,
+
+@router.put("/{taskID}", response_model=RescheduledTaskResponse)
+async def update_task(
+    db: AsyncDBSession,
     taskID: int,
     form_data: TaskUpdateForm = Depends(TaskUpdateForm.as_form),
-) -> None:
+) -> RescheduledTaskResponse:
     """Update an existing task and reschedule its events."""
-    db = db
-    taskID = taskID
-    form_data = form_data
-    raise NotImplementedError
+    result = await task_service.update_task(db, taskID, form_data)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Task not found.")
+
+    task, diff = result
+    return RescheduledTaskResponse(
+        task=TaskResponse.from_task(task),
+        changes=ScheduleDiffResponse.from_diff(diff),
+    )
 
 
-@router.delete("/{taskID}")
-def delete_task(db: DBSession, taskID: int) -> None:
+@router.delete("/{taskID}", response_model=ScheduleDiffResponse)
+async def delete_task(db: AsyncDBSession, taskID: int) -> ScheduleDiffResponse:
     """Delete a task and its events."""
-    db = db
-    taskID = taskID
-    raise NotImplementedError
+    diff = await task_service.delete_task(db, taskID)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Task not found.")
 
+    return ScheduleDiffResponse.from_diff(diff)
 
-@router.get("/user/{username}")
-def list_user_tasks(db: DBSession, username: str) -> None:
-    """Return all tasks for a user."""
-    db = db
-    username = username
-    raise NotImplementedError
 
+@router.get("/user/{username}", response_class=ORJSONResponse)
+async def list_user_tasks(
+    db: AsyncDBSession,
+    username: str,
+    include: list[PlannableRelation] = Query(default=[]),
+    page: PageParams = Depends(PageParams.as_query),
+) -> ORJSONResponse:
+    """
+    Return a page of the user's tasks (by deadline), with the relationships
+    in `include` (if any).
+    """
+    if not include:
+        tasks = await task_service.get_user_tasks(db, username, page.after, page.limit)
+        return ORJSONResponse(
+            {"tasks": _serialize_tasks(tasks), "next_cursor": page.next_cursor(tasks, "deadline")}
+        )
 
-@router.get("/user/{username}/latest")
-def get_latest_user_task(db: DBSession, username: str) -> None:
+    detailed = await task_service.get_user_task_details(
+        db, username, include, page.after, page.limit
+    )
+    payload = [TaskDetailResponse.from_task_with(task, include).model_dump() for task in detailed]
+    return ORJSONResponse({"tasks": payload, "next_cursor": page.next_cursor(detailed, "deadline")})
+
+
+@router.get("/user/{username}/latest", response_class=ORJSONResponse)
+async def get_latest_user_task(db: AsyncDBSession, username: str) -> ORJSONResponse:
     """Return the most recent task for a user."""
-    db = db
-    username = username
-    raise NotImplementedError
+    task = await task_service.get_latest_user_task(db, username)
+    return ORJSONResponse({"latest_task": _serialize_tasks([task])[0] if task else None})
+
+
+def _serialize_tasks(tasks: list[TaskRow]) -> list[dict[str, Any]]:
+    # Durations are in minutes, like in `TaskResponse`.
+    return rows_to_dicts(TaskRow._fields, tasks, {"duration": to_minutes})
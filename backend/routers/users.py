@@ -1,14 +1,196 @@
-from fastapi import APIRouter
+import zoneinfo
+from datetime import date, datetime, timedelta
+from typing import Any
 
-from backend.database import DBSession
-from backend.schemas import CreateUserRequest, UserSchema
+from fastapi import APIRouter, Body, HTTPException, Query
+
+from backend.database import AsyncDBSession
+from backend.schemas import (
+    CommonFreeSlotsResponse,
+    CreateUserRequest,
+    DailyLoadResponse,
+    DayLoadResponse,
+    FreeBusyResponse,
+    UserModelParametersResponse,
+    UserSchema,
+    UserSettingsResponse,
+    UserSettingsUpdate,
+)
+from backend.services import freebusy
+from backend.services import user_settings as settings_service
+from backend.services.daily_load import get_daily_load
+from backend.services.time import to_naive_utc
 from backend.services.users import create_user
+from backend.tools.jsonify import to_minutes
 
 router = APIRouter()
 
 
 @router.post("/create", response_model=UserSchema)
-def create(db: DBSession, request: CreateUserRequest) -> UserSchema:
+async def create(db: AsyncDBSession, request: CreateUserRequest) -> UserSchema:
     """Create a new user account."""
-    user = create_user(db, request.username)
+    user = await create_user(db, request.username)
     return UserSchema.from_orm(user)
+
+
+@router.get("/freebusy/common", response_model=CommonFreeSlotsResponse)
+async def get_common_free_slots(
+    db: AsyncDBSession,
+    start: datetime,
+    end: datetime,
+    usernames: list[str] = Query(min_length=1, max_length=freebusy.MAX_USERS),
+    min_minutes: int = Query(default=0, ge=0),
+    working_hours_only: bool = False,
+) -> CommonFreeSlotsResponse:
+    """Return the slots in [start, end) when none of the users are busy."""
+    _check_window(start, end)
+    free = await freebusy.get_common_free_slots(
+        db, usernames, start, end, timedelta(minutes=min_minutes), working_hours_only
+    )
+    return CommonFreeSlotsResponse(usernames=usernames, start=start, end=end, free=free)
+
+
+@router.get("/{username}/freebusy", response_model=FreeBusyResponse)
+async def get_freebusy(
+    db: AsyncDBSession,
+    username: str,
+    start: datetime,
+    end: datetime,
+) -> FreeBusyResponse:
+    """Return when the user is busy in [start, end), with overlapping events merged."""
+    _check_window(start, end)
+    busy = await freebusy.get_busy(db, username, start, end)
+    return FreeBusyResponse(username=username, start=start, end=end, busy=busy)
+
+
+@router.get("/{username}/daily_load", response_model=DailyLoadResponse)
+async def daily_load(
+    db: AsyncDBSession,
+    username: str,
+    start: date,
+    end: date,
+) -> DailyLoadResponse:
+    """Return the minutes booked on each of the user's local days in [start, end)."""
+    if end <= start:
+        raise HTTPException(status_code=400, detail="`end` must be after `start`.")
+    if end - start > freebusy.MAX_WINDOW:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The window can't be longer than {freebusy.MAX_WINDOW.days} days.",
+        )
+
+    loads = await get_daily_load(db, username, start, end)
+    days = [DayLoadResponse(day=load.day, minutes=to_minutes(load.booked)) for load in loads]
+    return DailyLoadResponse(username=username, days=days)
+
+
+@router.get("/{username}/settings", response_model=UserSettingsResponse)
+async def get_settings(db: AsyncDBSession, username: str) -> UserSettingsResponse:
+    """Return the user's settings (the defaults for the ones they didn't change)."""
+    settings = await settings_service.get_user_settings(db, username)
+    if settings is None:
+        raise HTTPException(status_code=404, detail="User not found.")
+    return UserSettingsResponse(timezone=settings.timezone, theme=settings.theme)
+
+
+@router.patch("/{username}/settings", response_model=UserSettingsResponse)
+async def update_settings(
+    db: AsyncDBSession,
+    username: str,
+    request: UserSettingsUpdate,
+) -> UserSettingsResponse:
+    """Change some of the user's settings."""
+    if request.timezone is not None:
+        _check_timezone(request.timezone)
+    settings = await settings_service.update_user_settings(
+        db, username, timezone=request.timezone, theme=request.theme
+    )
+    if settings is None:
+        raise HTTPException(status_code=404, detail="User not found.")
+    return UserSettingsResponse(timezone=settings.timezone, theme=settings.theme)
+
+
+@router.delete("/{username}/settings", response_model=UserSettingsResponse)
+async def reset_settings(db: AsyncDBSession, username: str) -> UserSettingsResponse:
+    """Go back to the default settings."""
+    await settings_service.reset_user_settings(db, username)
+    return await get_settings(db, username)
+
+
+@router.get("/{username}/model_parameters", response_model=UserModelParametersResponse)
+async def get_model_parameters(
+    db: AsyncDBSession,
+    username: str,
+    keys: list[str] | None = Query(default=None),
+) -> UserModelParametersResponse:
+    """Return the user's model parameters ({} if they have none), or only the given keys."""
+    parameters = await settings_service.get_user_model_parameters(db, username, keys)
+    if parameters is None:
+        raise HTTPException(status_code=404, detail="User not found.")
+    return UserModelParametersResponse(parameters=parameters)
+
+
+@router.put("/{username}/model_parameters", response_model=UserModelParametersResponse)
+async def set_model_parameters(
+    db: AsyncDBSession,
+    username: str,
+    parameters: dict[str, Any] = Body(),
+) -> UserModelParametersResponse:
+    """Replace the user's model parameters."""
+    result = await settings_service.set_user_model_parameters(db, username, parameters)
+    if result is None:
+        raise HTTPException(status_code=404, detail="User not found.")
+    return UserModelParametersResponse(parameters=result)
+
+
+@router.put(
+    "/{username}/model_parameters/{path:path}",
+    response_model=UserModelParametersResponse,
+)
+async def set_model_parameter(
+    db: AsyncDBSession,
+    username: str,
+    path: str,
+    value: Any = Body(),
+) -> UserModelParametersResponse:
+    """
+    Set a single model parameter, e.g., PUT .../model_parameters/estimates/bias, and
+    return the top-level key it belongs to.
+    """
+    keys = path.strip("/").split("/")
+    if not await settings_service.set_user_model_parameter(db, username, keys, value):
+        raise HTTPException(status_code=404, detail="User not found.")
+    return await get_model_parameters(db, username, keys[:1])
+
+
+@router.delete(
+    "/{username}/model_parameters/{path:path}",
+    response_model=UserModelParametersResponse,
+)
+async def delete_model_parameter(
+    db: AsyncDBSession,
+    username: str,
+    path: str,
+) -> UserModelParametersResponse:
+    """Remove a single model parameter, and return what is left of its top-level key."""
+    keys = path.strip("/").split("/")
+    await settings_service.delete_user_model_parameter(db, username, keys)
+    return await get_model_parameters(db, username, keys[:1])
+
+
+def _check_timezone(name: str) -> None:
+    try:
+        zoneinfo.ZoneInfo(name)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {name}.") from None
+
+
+def _check_window(start: datetime, end: datetime) -> None:
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="`end` must be after `start`.")
+    if end - start > freebusy.MAX_WINDOW:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The window can't be longer than {freebusy.MAX_WINDOW.days} days.",
+        )
@@ -16,7 +16,10 @@ from backend.database import (
 )
 
 # flake8: noqa: F403, F401
+from backend.schemas.calendars import *
 from backend.schemas.events import *
+from backend.schemas.pagination import *
+from backend.schemas.plannable_attributes import *
 from backend.schemas.tasks import *
 from backend.schemas.users import *
 
@@ -0,0 +1,46 @@
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel, ConfigDict, field_validator
+
+# Schemes of the feeds that can be subscribed to (`webcal` is fetched over HTTPS).
+FEED_URL_SCHEMES = {"http", "https", "webcal"}
+
+
+class ExternalCalendarCreate(BaseModel):
+    username: str
+    provider: str
+    url: str | None = None
+
+    @field_validator("url")
+    @classmethod
+    def check_url_scheme(cls, url: str | None) -> str | None:
+        if url is not None and urlsplit(url).scheme.lower() not in FEED_URL_SCHEMES:
+            raise ValueError(f"The URL's scheme must be one of {sorted(FEED_URL_SCHEMES)}.")
+        return url
+
+
+class ExternalCalendarResponse(BaseModel):
+    """
+    External calendar subscription as returned by the API.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+    provider: str
+    url: str | None
+
+
+class CalendarSyncResponse(BaseModel):
+    """
+    Number of events created/updated/deleted/left unchanged by a sync.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    created: int
+    updated: int
+    deleted: int
+    unchanged: int
+    skipped: bool
@@ -1,8 +1,93 @@
+from collections.abc import Iterable
 from datetime import datetime
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+
+from backend.database import Event
+from backend.misc.loading import PlannableRelation
+from backend.schemas.calendars import ExternalCalendarResponse
+from backend.schemas.plannable_attributes import RecurrenceResponse, TagResponse
 
 
 class TaskEventUpdate(BaseModel):
     start: datetime
     end: datetime
+
+
+class EventResponse(BaseModel):
+    """
+    Event (or an occurrence of a recurring one) as returned by the listing endpoints.
+    """
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    task_id: int | None
+    external_calendar_id: int | None
+    title: str
+    description: str
+    priority: int
+    is_completed: bool | None
+    start: datetime
+    end: datetime
+    # Set if this is an occurrence of a recurring event.
+    recurrence_id: int | None = None
+
+
+class EventDetailResponse(EventResponse):
+    """
+    Event together with the relationships requested with `?include=`.
+    """
+
+    tags: list[TagResponse] | None = None
+    recurrence: RecurrenceResponse | None = None
+    external_calendar: ExternalCalendarResponse | None = None
+
+    @classmethod
+    def from_event(
+        cls,
+        event: Event,
+        include: Iterable[PlannableRelation],
+    ) -> "EventDetailResponse":
+        """Build the response from an Event whose `include`d relationships are loaded."""
+        # Not `cls.model_validate(event)`, which would touch every relationship.
+        base = EventResponse.model_validate(event)
+        return cls(**base.model_dump(), **related_fields(event, include))
+
+
+def related_fields(plannable: object, include: Iterable[PlannableRelation]) -> dict:
+    """Validate the included (and only those, since others aren't loaded) relationships."""
+    fields: dict = {}
+    for relation in set(include):
+        value = getattr(plannable, relation.value)
+        if relation == PlannableRelation.TAGS:
+            fields["tags"] = [TagResponse.model_validate(tag) for tag in value]
+        elif relation == PlannableRelation.EVENTS:
+            fields["events"] = [EventResponse.model_validate(event) for event in value]
+        elif relation == PlannableRelation.RECURRENCE and value is not None:
+            fields["recurrence"] = RecurrenceResponse.model_validate(value)
+        elif relation == PlannableRelation.EXTERNAL_CALENDAR and value is not None:
+            fields["external_calendar"] = ExternalCalendarResponse.model_validate(value)
+    return fields
+
+
+class EventCreate(BaseModel):
+    """
+    Standalone event to create (as part of a batch).
+    """
+
+    title: str
+    description: str = ""
+    priority: int = 0
+    start: datetime
+    end: datetime
+
+
+class EventMove(BaseModel):
+    """
+    New times of an existing event (as part of a batch).
+    """
+
+    id: int
+    start: datetime
+    end: datetime
@@ -0,0 +1,41 @@
+from collections.abc import Sequence
+from typing import Any
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+from backend.misc.defaults import DefaultPagination
+from backend.tools.cursors import Cursor, decode_cursor, encode_cursor
+
+
+class PageParams(BaseModel):
+    """
+    Keyset pagination parameters of a listing (`?cursor=...&limit=...`).
+    """
+
+    after: Cursor | None = None
+    limit: int = DefaultPagination.page_size
+
+    @classmethod
+    def as_query(
+        cls,
+        cursor: str | None = Query(default=None),
+        limit: int = Query(
+            default=DefaultPagination.page_size,
+            ge=1,
+            le=DefaultPagination.max_page_size,
+        ),
+    ) -> "PageParams":
+        """Create a PageParams instance from query parameters."""
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.") from None
+        return cls(after=after, limit=limit)
+
+    def next_cursor(self, rows: Sequence[Any], time_field: str) -> str | None:
+        """Return the cursor of the page after `rows`, or None if there are no more."""
+        if len(rows) < self.limit:
+            return None
+        last = rows[-1]
+        return encode_cursor(getattr(last, time_field), last.id)
@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class TagResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+
+
+class RecurrenceResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    start: datetime
+    until: datetime | None
+    frequency: str
+    interval: int
+    excluded: list[datetime] | None
+    timezone: str | None
@@ -1,8 +1,19 @@
+from collections.abc import Iterable
 from datetime import datetime
+from typing import TYPE_CHECKING
 
 from fastapi import Form
 from pydantic import BaseModel
 
+from backend.database import Task
+from backend.misc.loading import PlannableRelation
+from backend.schemas.calendars import ExternalCalendarResponse
+from backend.schemas.events import EventResponse, related_fields
+from backend.schemas.plannable_attributes import RecurrenceResponse, TagResponse
+
+if TYPE_CHECKING:
+    from backend.services.scheduler import ScheduleDiff
+
 
 class TaskBaseForm(BaseModel):
     """
@@ -39,7 +50,21 @@ class TaskCreateForm(TaskBaseForm):
     Form model for creating a new task.
     """
 
-    # Inherits `as_form` directly.
+    username: str
+
+    @classmethod
+    def as_form(
+        cls,
+        title: str = Form(...),
+        description: str = Form(...),
+        duration: int = Form(...),
+        priority: int = Form(...),
+        deadline: datetime = Form(...),
+        username: str = Form(...),
+    ) -> "TaskCreateForm":
+        """Create a TaskCreateForm instance from form data."""
+        base = TaskBaseForm.as_form(title, description, duration, priority, deadline)
+        return cls(username=username, **base.model_dump())
 
 
 class TaskUpdateForm(TaskBaseForm):
@@ -63,3 +88,102 @@ class TaskUpdateForm(TaskBaseForm):
         # Reuse TaskBaseForm’s constructor by unpacking.
         base = TaskBaseForm.as_form(title, description, duration, priority, deadline)
         return cls(editID=editID, **base.model_dump())
+
+
+class TaskCreate(BaseModel):
+    """
+    Task to create (as part of a batch). `duration` is in minutes, like in the forms.
+    """
+
+    title: str
+    description: str = ""
+    duration: int
+    priority: int = 0
+    deadline: datetime
+
+
+class TaskResponse(BaseModel):
+    """
+    Task as returned by the API. `duration` is in minutes, like in the forms.
+    """
+
+    id: int
+    username: str
+    title: str
+    description: str
+    priority: int
+    is_completed: bool | None
+    deadline: datetime
+    duration: int
+
+    @classmethod
+    def from_task(cls, task: Task) -> "TaskResponse":
+        """Build the response from a Task, converting its duration to minutes."""
+        return cls(
+            id=task.id,
+            username=task.username,
+            title=task.title,
+            description=task.description,
+            priority=task.priority,
+            is_completed=task.is_completed,
+            deadline=task.deadline,
+            duration=int(task.duration.total_seconds() // 60),
+        )
+
+
+class TaskDetailResponse(TaskResponse):
+    """
+    Task together with the relationships requested with `?include=`.
+    """
+
+    tags: list[TagResponse] | None = None
+    recurrence: RecurrenceResponse | None = None
+    external_calendar: ExternalCalendarResponse | None = None
+    events: list[EventResponse] | None = None
+
+    @classmethod
+    def from_task_with(
+        cls,
+        task: Task,
+        include: Iterable[PlannableRelation],
+    ) -> "TaskDetailResponse":
+        """Build the response from a Task whose `include`d relationships are loaded."""
+        base = TaskResponse.from_task(task)
+        return cls(**base.model_dump(), **related_fields(task, include))
+
+
+class ScheduledTaskResponse(BaseModel):
+    """
+    Task together with the events it was scheduled into.
+    """
+
+    task: TaskResponse
+    events: list[EventResponse]
+
+
+class ScheduleDiffResponse(BaseModel):
+    """
+    Events moved/created/deleted by rescheduling.
+    """
+
+    moved: list[EventResponse]
+    created: list[EventResponse]
+    deleted: list[int]
+
+    @classmethod
+    def from_diff(cls, diff: "ScheduleDiff") -> "ScheduleDiffResponse":
+        """Build the response from a scheduler's diff."""
+        return cls(
+            moved=[EventResponse.model_validate(event) for event in diff.moved],
+            created=[EventResponse.model_validate(event) for event in diff.created],
+            deleted=diff.deleted,
+        )
+
+
+class RescheduledTaskResponse(BaseModel):
+    """
+    Updated task together with the changes made to the schedule.
+    """
+
+    task: TaskResponse
+    changes: ScheduleDiffResponse
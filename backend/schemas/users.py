@@ -1,5 +1,68 @@
+from datetime import date, datetime
+from typing import Any
+
 from pydantic import BaseModel
 
+from backend.misc.user_settings import Theme
+
 
 class CreateUserRequest(BaseModel):
     username: str
+
+
+class FreeBusyResponse(BaseModel):
+    """
+    When a user is busy within a window, as sorted, disjoint [start, end) intervals.
+    """
+
+    username: str
+    start: datetime
+    end: datetime
+    busy: list[tuple[datetime, datetime]]
+
+
+class CommonFreeSlotsResponse(BaseModel):
+    """
+    When none of the users are busy within a window.
+    """
+
+    usernames: list[str]
+    start: datetime
+    end: datetime
+    free: list[tuple[datetime, datetime]]
+
+
+class DayLoadResponse(BaseModel):
+    day: date
+    minutes: int
+
+
+class DailyLoadResponse(BaseModel):
+    """
+    Time booked by a user's events on each local day of a window (in their timezone).
+    """
+
+    username: str
+    days: list[DayLoadResponse]
+
+
+class UserSettingsResponse(BaseModel):
+    """
+    A user's settings, including the defaults of the ones they didn't change.
+    """
+
+    timezone: str
+    theme: Theme
+
+
+class UserSettingsUpdate(BaseModel):
+    """
+    Settings to change (the ones left out are kept as they are).
+    """
+
+    timezone: str | None = None
+    theme: Theme | None = None
+
+
+class UserModelParametersResponse(BaseModel):
+    parameters: dict[str, Any]
@@ -0,0 +1,163 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import httpx
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from backend.database import ExternalCalendar
+from backend.database.db_session import AsyncSessionLocal
+from backend.misc.config import (
+    CALENDAR_SYNC_CONCURRENCY,
+    CALENDAR_SYNC_INTERVAL,
+    CALENDAR_SYNC_JITTER,
+    CALENDAR_SYNC_POLL_INTERVAL,
+)
+from backend.misc.logger import get_logger
+from backend.services.external_calendars import FETCH_TIMEOUT, sync_calendar
+
+log = get_logger(__name__)
+
+# Retry delays (in seconds) of a failing calendar grow exponentially up to the max.
+BACKOFF_BASE = 60
+BACKOFF_MAX = 6 * 60 * 60
+
+
+class CalendarSyncWorker:
+    """
+    Periodically syncs every external calendar in the background.
+
+    Due calendars are claimed in the DB (so that several worker processes
+    don't sync the same one), then synced concurrently, up to `concurrency`
+    at a time, each after a random delay of up to `jitter` seconds. A calendar
+    that fails is retried with exponential backoff. The schedule is stored in
+    the calendars' rows, so every process (and restart) follows it.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        interval: float = CALENDAR_SYNC_INTERVAL,
+        poll_interval: float = CALENDAR_SYNC_POLL_INTERVAL,
+        concurrency: int = CALENDAR_SYNC_CONCURRENCY,
+        jitter: float = CALENDAR_SYNC_JITTER,
+    ) -> None:
+        self._session_factory = session_factory
+        self._interval = interval
+        self._poll_interval = poll_interval
+        self._concurrency = concurrency
+        self._jitter = jitter
+        self._task: asyncio.Task | None = None
+        self._syncs: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        """Start syncing in the background (returns immediately)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="calendar-sync")
+            log.info("Started background calendar sync.")
+
+    async def stop(self) -> None:
+        """Cancel the background loop and any sync in progress."""
+        tasks = [*self._syncs, *([self._task] if self._task else [])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        log.info("Stopped background calendar sync.")
+
+    async def _run(self) -> None:
+        semaphore = asyncio.Semaphore(self._concurrency)
+        async with httpx.AsyncClient(timeout=FETCH_TIMEOUT, follow_redirects=True) as client:
+            while True:
+                try:
+                    await self._dispatch_due(client, semaphore)
+                except Exception:
+                    log.exception("Failed to dispatch calendar syncs.")
+                await asyncio.sleep(self._poll_interval)
+
+    async def _dispatch_due(
+        self,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        # Don't claim more than can start soon, leave the rest to other processes.
+        limit = max(self._concurrency * 2 - len(self._syncs), 0)
+        if not limit:
+            return
+
+        for calendar_id in await self._claim_due(limit):
+            task = asyncio.create_task(self._sync(calendar_id, client, semaphore))
+            self._syncs.add(task)
+            task.add_done_callback(self._syncs.discard)
+
+    async def _claim_due(self, limit: int) -> list[int]:
+        """
+        Return the IDs of due calendars, scheduled for their next sync meanwhile
+        (so that other processes skip them, and they're retried if this one dies).
+        """
+        now = datetime.now(timezone.utc)
+        due = (
+            select(ExternalCalendar.id)
+            .where(
+                ExternalCalendar.url.is_not(None),
+                or_(ExternalCalendar.next_sync_at.is_(None), ExternalCalendar.next_sync_at <= now),
+            )
+            .order_by(ExternalCalendar.next_sync_at.nulls_first())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        async with self._session_factory() as db, db.begin():
+            result = await db.scalars(
+                update(ExternalCalendar)
+                .where(ExternalCalendar.id.in_(due.scalar_subquery()))
+                .values(next_sync_at=now + timedelta(seconds=self._interval))
+                .returning(ExternalCalendar.id)
+                .execution_options(synchronize_session=False)
+            )
+            return list(result)
+
+    async def _sync(
+        self,
+        calendar_id: int,
+        client: httpx.AsyncClient,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        await asyncio.sleep(random.uniform(0, self._jitter))
+        async with semaphore:
+            try:
+                async with self._session_factory() as db, db.begin():
+                    calendar = await db.get(ExternalCalendar, calendar_id)
+                    if calendar is not None:
+                        await sync_calendar(db, calendar, client)
+                        calendar.failure_count = 0
+                        calendar.next_sync_at = datetime.now(timezone.utc) + timedelta(
+                            seconds=self._interval
+                        )
+            except Exception as error:
+                try:
+                    await self._back_off(calendar_id, error)
+                except Exception:
+                    log.exception("Failed to back off from calendar %s.", calendar_id)
+
+    async def _back_off(self, calendar_id: int, error: Exception) -> None:
+        """Record a failed sync, and postpone the next one exponentially."""
+        async with self._session_factory() as db, db.begin():
+            calendar = await db.get(ExternalCalendar, calendar_id, with_for_update=True)
+            if calendar is None:
+                return
+            failures = calendar.failure_count = calendar.failure_count + 1
+            delay = min(BACKOFF_BASE * 2 ** (failures - 1), BACKOFF_MAX)
+            delay *= random.uniform(0.5, 1.5)
+            calendar.next_sync_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+        log.warning(
+            "Failed to sync calendar %s (%s in a row), retrying in %.0fs: %r",
+            calendar_id,
+            failures,
+            delay,
+            error,
+        )
+
+
+calendar_sync_worker = CalendarSyncWorker()
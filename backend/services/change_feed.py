@@ -0,0 +1,156 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Protocol
+
+import asyncpg
+
+from backend.database.change_notifications import CHANGES_CHANNEL
+from backend.database.constants import DATABASE_URL
+from backend.misc.config import CHANGE_FEED_COALESCE, CHANGE_FEED_HEARTBEAT
+from backend.misc.logger import get_logger
+
+log = get_logger(__name__)
+
+# Seconds between attempts to reconnect a lost LISTEN connection.
+RECONNECT_DELAY = 5
+# Sent instead of table names when changes may have been missed (e.g., on reconnect).
+RESYNC = "*"
+
+
+class Subscription:
+    """
+    Tables in which a user's rows changed, since the subscriber last looked.
+
+    Changes are coalesced in a set (instead of queued), so a slow subscriber
+    costs no memory, and a burst of writes is sent as a single message.
+    """
+
+    def __init__(self, username: str) -> None:
+        self.username = username
+        self._tables: set[str] = set()
+        self._changed = asyncio.Event()
+
+    def notify(self, table: str) -> None:
+        self._tables.add(table)
+        self._changed.set()
+
+    async def changes(
+        self,
+        heartbeat: float = CHANGE_FEED_HEARTBEAT,
+        coalesce: float = CHANGE_FEED_COALESCE,
+    ) -> AsyncIterator[set[str]]:
+        """
+        Yield the changed tables as they change, or an empty set after `heartbeat`
+        seconds without changes (so that idle connections can be kept alive).
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._changed.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield set()
+                continue
+
+            # Let the rest of a burst (e.g., all events of a task) arrive first.
+            await asyncio.sleep(coalesce)
+            tables, self._tables = self._tables, set()
+            self._changed.clear()
+            yield tables
+
+
+class ChangeHub:
+    """
+    In-process fan-out of change notifications to the subscriptions of each user.
+    """
+
+    def __init__(self) -> None:
+        self._subscriptions: dict[str, set[Subscription]] = {}
+
+    def subscribe(self, username: str) -> Subscription:
+        subscription = Subscription(username)
+        self._subscriptions.setdefault(username, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.username, set())
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            self._subscriptions.pop(subscription.username, None)
+
+    def publish(self, username: str, table: str) -> None:
+        for subscription in self._subscriptions.get(username, ()):
+            subscription.notify(table)
+
+    def publish_all(self, table: str) -> None:
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.notify(table)
+
+
+class ChangeSource(Protocol):
+    """
+    Where notifications come from, shared by all worker processes (e.g., `PostgresChangeSource`).
+    """
+
+    def start(self, hub: ChangeHub) -> None: ...
+
+    async def stop(self) -> None: ...
+
+
+class PostgresChangeSource:
+    """
+    LISTENs to the notifications sent by the DB triggers on `plannable`/`task`/`event`
+    (see `database/change_notifications.py`), so that writes of any worker process
+    (or of anything else writing to the DB) reach the subscribers of this one.
+    """
+
+    def __init__(self, dsn: str = DATABASE_URL, channel: str = CHANGES_CHANNEL) -> None:
+        self._dsn = dsn
+        self._channel = channel
+        self._task: asyncio.Task | None = None
+
+    def start(self, hub: ChangeHub) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(hub), name="change-feed")
+            log.info("Started listening to calendar changes.")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            log.info("Stopped listening to calendar changes.")
+
+    async def _run(self, hub: ChangeHub) -> None:
+        while True:
+            try:
+                await self._listen(hub)
+                log.warning("Lost the connection listening to calendar changes.")
+            except (OSError, asyncpg.PostgresError) as error:
+                log.warning("Can't listen to calendar changes, retrying: %r", error)
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _listen(self, hub: ChangeHub) -> None:
+        """Forward notifications to the hub until the connection is lost."""
+
+        def on_notification(_: object, __: int, ___: str, payload: str) -> None:
+            try:
+                change = json.loads(payload)
+                hub.publish(change["username"], change["table"])
+            except (ValueError, KeyError):
+                log.warning("Ignoring malformed change notification: %s", payload)
+
+        connection = await asyncpg.connect(self._dsn)
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+        try:
+            await connection.add_listener(self._channel, on_notification)
+            # Anything may have changed while there was no connection.
+            hub.publish_all(RESYNC)
+            await lost.wait()
+        finally:
+            await connection.close()
+
+
+change_hub = ChangeHub()
+change_source: ChangeSource = PostgresChangeSource()
@@ -0,0 +1,74 @@
+import zoneinfo
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import DailyLoad
+from backend.services.events import get_recurring_busy_times
+from backend.services.time import load_user_timezone, to_aware_utc, to_naive_utc
+from backend.tools.free_slots import Interval
+
+
+class DayLoad(NamedTuple):
+    day: date
+    booked: timedelta
+
+
+async def get_daily_load(
+    db: AsyncSession,
+    username: str,
+    first_day: date,
+    end_day: date,
+) -> list[DayLoad]:
+    """
+    Return the time booked by the user's events on each local day in [first_day, end_day),
+    including the days with nothing booked.
+
+    One-off events are read from the `daily_load` aggregate (one row per day),
+    recurring ones are expanded over the window only.
+    """
+    zone = await load_user_timezone(db, username)
+    booked: dict[date, timedelta] = defaultdict(timedelta)
+
+    result = await db.execute(
+        select(DailyLoad.day, DailyLoad.booked).where(
+            DailyLoad.username == username,
+            DailyLoad.day >= first_day,
+            DailyLoad.day < end_day,
+        )
+    )
+    booked.update(result.tuples().all())
+
+    window_start, window_end = day_bounds(first_day, zone)[0], day_bounds(end_day, zone)[0]
+    _, recurring = await get_recurring_busy_times(db, username, window_start, window_end)
+    for start, end in recurring:
+        add_booked_time(booked, max(start, window_start), min(end, window_end), zone)
+
+    days = (first_day + timedelta(days=offset) for offset in range((end_day - first_day).days))
+    return [DayLoad(day, booked[day]) for day in days]
+
+
+def day_bounds(day: date, zone: zoneinfo.ZoneInfo) -> Interval:
+    """Return the naive UTC start/end of a local day (which isn't always 24h long)."""
+    return (
+        to_naive_utc(datetime.combine(day, time(), tzinfo=zone)),
+        to_naive_utc(datetime.combine(day + timedelta(days=1), time(), tzinfo=zone)),
+    )
+
+
+def add_booked_time(
+    booked: dict[date, timedelta],
+    start: datetime,
+    end: datetime,
+    zone: zoneinfo.ZoneInfo,
+) -> None:
+    """Add the naive UTC interval to the time booked on each local day it spans."""
+    moment, end = to_aware_utc(start), to_aware_utc(end)
+    while moment < end:
+        day = moment.astimezone(zone).date()
+        day_end = min(to_aware_utc(day_bounds(day, zone)[1]), end)
+        booked[day] = booked.get(day, timedelta()) + (day_end - moment)
+        moment = day_end
@@ -1,91 +1,417 @@
+from collections.abc import Iterable
 from datetime import datetime
+from typing import NamedTuple, cast
 
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    Select,
+    Table,
+    column,
+    delete,
+    insert,
+    literal,
+    or_,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.database import Event, Task, User
-from backend.misc.config import DATETIME_FORMAT
+from backend.database import Event, Plannable, Recurrence, User
+from backend.misc.defaults import DefaultPagination
+from backend.misc.loading import PlannableRelation
+from backend.schemas.events import EventCreate, EventMove
+from backend.services.loading import plannable_loader_options
+from backend.services.recurrence import RecurrenceRow, occurrence_cache
+from backend.services.time import load_user_timezone, to_aware_utc, to_naive_utc
+from backend.tools.cursors import Cursor
+from backend.tools.free_slots import Interval
 
+# Core tables (typed as such, the ORM declares them as FromClause) for bulk UPDATE ... FROM.
+_event_table = cast(Table, Event.__table__)
+_plannable_table = cast(Table, Plannable.__table__)
 
-def get_events(username: str, interval: tuple[datetime, datetime], db: Session) -> dict:
-    """Return all events for the given user that fall within the provided time interval."""
-    raise NotImplementedError
 
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        return {"events": []}
+class EventRow(NamedTuple):
+    """
+    Read-only view of an event (same fields as `EventResponse`), selected without the ORM.
+    """
 
-    user_events = user.events
-    events = [event for event in user_events if interval[0] < event.start < interval[1]]
-    events = events
-    return None
+    id: int
+    task_id: int | None
+    external_calendar_id: int | None
+    title: str
+    description: str
+    priority: int
+    is_completed: bool | None
+    start: datetime
+    end: datetime
+    # Set if this is an occurrence of a recurring event.
+    recurrence_id: int | None = None
 
 
-def get_all_events(username: str, db: Session) -> dict:
-    """Return all events for the given user in JSON format with start/end as strings."""
-    raise NotImplementedError
+# Columns selected into `EventRow`s (all but `recurrence_id`, which comes from expansion).
+EVENT_COLUMNS = tuple(getattr(Event, field) for field in EventRow._fields[:-1])
+RECURRENCE_COLUMNS = tuple(getattr(Recurrence, field) for field in RecurrenceRow._fields)
 
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        return {"events": []}
 
-    event_models: list[Event] = user.events
-    events = [
-        {
-            "start": e.start.strftime(DATETIME_FORMAT),
-            "end": e.end.strftime(DATETIME_FORMAT),
-            "eventID": e.eventID,
-            "title": e.task.title,
-        }
-        for e in event_models
+class EventOccurrence(NamedTuple):
+    event: Event
+    start: datetime
+    end: datetime
+    recurrence_id: int | None
+
+
+async def get_events(
+    db: AsyncSession,
+    username: str,
+    start: datetime,
+    end: datetime,
+) -> list[Event]:
+    """
+    Return the user's events that overlap the [start, end) window, ordered by start.
+
+    Events straddling either boundary are included. The filter is served by
+    the `(username, start, end)` index, so the cost depends on the size of
+    the window rather than on the user's whole history.
+    """
+    result = await db.scalars(
+        select(Event).where(*_overlapping(username, start, end)).order_by(Event.start, Event.id)
+    )
+    return list(result)
+
+
+async def get_recurring_events(
+    db: AsyncSession,
+    username: str,
+    start: datetime,
+    end: datetime,
+) -> list[tuple[Event, Recurrence]]:
+    """Return the user's recurring events whose series can overlap the [start, end) window."""
+    result = await db.execute(
+        select(Event, Recurrence)
+        .join(Recurrence, Recurrence.plannable_id == Event.id)
+        .where(*_recurring_overlapping(username, start, end))
+    )
+    return [(event, recurrence) for event, recurrence in result]
+
+
+async def get_event_occurrences(
+    db: AsyncSession,
+    username: str,
+    start: datetime,
+    end: datetime,
+) -> list[EventOccurrence]:
+    """
+    Return everything to render in the [start, end) window, ordered by start.
+
+    One-off events come straight from the range index, while recurring ones
+    are expanded lazily (and cached) for this window only.
+    """
+    recurring = await get_recurring_events(db, username, start, end)
+    recurring_ids = {event.id for event, _ in recurring}
+
+    occurrences = [
+        EventOccurrence(event, event.start, event.end, None)
+        for event in await get_events(db, username, start, end)
+        if event.id not in recurring_ids
+    ]
+
+    if recurring:
+        zone = await load_user_timezone(db, username)
+        for event, recurrence in recurring:
+            expanded = occurrence_cache.get_or_expand(
+                recurrence, event.end - event.start, zone, start, end
+            )
+            occurrences.extend(
+                EventOccurrence(
+                    event,
+                    to_naive_utc(occurrence.start),
+                    to_naive_utc(occurrence.end),
+                    recurrence.id,
+                )
+                for occurrence in expanded
+            )
+
+    occurrences.sort(key=lambda occurrence: (occurrence.start, occurrence.event.id))
+    return occurrences
+
+
+async def list_event_occurrences(
+    db: AsyncSession,
+    username: str,
+    start: datetime,
+    end: datetime,
+    after: Cursor | None = None,
+    limit: int = DefaultPagination.page_size,
+) -> list[EventRow]:
+    """
+    Read-only version of `get_event_occurrences` for rendering, a page at a time.
+
+    Only the displayed columns are selected, straight into `EventRow`s, so no
+    ORM objects (or identity map entries) are created for them. Rows are
+    ordered by (start, id); pass those of the last row of a page as `after`
+    to get the next one.
+    """
+    recurring = [
+        (EventRow(*row[: len(EVENT_COLUMNS)]), RecurrenceRow(*row[len(EVENT_COLUMNS) :]))
+        for row in await db.execute(
+            select(*EVENT_COLUMNS, *RECURRENCE_COLUMNS)
+            .join(Recurrence, Recurrence.plannable_id == Event.id)
+            .where(*_recurring_overlapping(username, start, end))
+        )
+    ]
+    recurring_ids = {event.id for event, _ in recurring}
+
+    # Recurring events are filtered out afterwards, so fetch enough to fill the page anyway.
+    one_off = await db.execute(
+        _events_page(
+            select(*EVENT_COLUMNS).where(*_overlapping(username, start, end)),
+            after,
+            limit + len(recurring_ids),
+        )
+    )
+    rows = [EventRow(*row) for row in one_off if row.id not in recurring_ids]
+
+    if recurring:
+        zone = await load_user_timezone(db, username)
+        for event, recurrence in recurring:
+            # The whole window is expanded (rather than from `after`), so pages share the cache.
+            expanded = occurrence_cache.get_or_expand(
+                recurrence, event.end - event.start, zone, start, end
+            )
+            for occurrence in expanded:
+                row = event._replace(
+                    start=to_naive_utc(occurrence.start),
+                    end=to_naive_utc(occurrence.end),
+                    recurrence_id=recurrence.id,
+                )
+                if after is None or (row.start, row.id) > after:
+                    rows.append(row)
+        rows.sort(key=lambda row: (row.start, row.id))
+
+    return rows[:limit]
+
+
+async def get_busy_times(
+    db: AsyncSession,
+    username: str,
+    start: datetime,
+    end: datetime,
+) -> list[Interval]:
+    """
+    Return the (unmerged) times the user is busy within [start, end), clipped to it.
+
+    Same events as `list_event_occurrences` (incl. recurring and imported ones),
+    but only their times are selected.
+    """
+    recurring_ids, times = await get_recurring_busy_times(db, username, start, end)
+
+    one_off = await db.execute(
+        select(Event.id, Event.start, Event.end).where(*_overlapping(username, start, end))
+    )
+    times.extend(
+        (event_start, event_end)
+        for event_id, event_start, event_end in one_off
+        if event_id not in recurring_ids
+    )
+
+    window_start, window_end = to_naive_utc(start), to_naive_utc(end)
+    return [
+        (max(busy_start, window_start), min(busy_end, window_end)) for busy_start, busy_end in times
     ]
 
-    return {"events": events}
 
+async def get_recurring_busy_times(
+    db: AsyncSession,
+    username: str,
+    start: datetime,
+    end: datetime,
+) -> tuple[set[int], list[Interval]]:
+    """
+    Return the IDs of the user's recurring events whose series can overlap [start, end),
+    and the (unclipped) times of their occurrences in it.
+    """
+    recurring = await db.execute(
+        select(Event.id, Event.start, Event.end, *RECURRENCE_COLUMNS)
+        .join(Recurrence, Recurrence.plannable_id == Event.id)
+        .where(*_recurring_overlapping(username, start, end))
+    )
+    recurring_rows = [(row[:3], RecurrenceRow(*row[3:])) for row in recurring]
+    recurring_ids = {event_id for (event_id, _, _), _ in recurring_rows}
+
+    times: list[Interval] = []
+    if recurring_rows:
+        zone = await load_user_timezone(db, username)
+        for (_, event_start, event_end), recurrence in recurring_rows:
+            expanded = occurrence_cache.get_or_expand(
+                recurrence, event_end - event_start, zone, start, end
+            )
+            times.extend(
+                (to_naive_utc(occurrence.start), to_naive_utc(occurrence.end))
+                for occurrence in expanded
+            )
+
+    return recurring_ids, times
+
+
+async def get_all_events(
+    db: AsyncSession,
+    username: str,
+    after: Cursor | None = None,
+    limit: int = DefaultPagination.page_size,
+) -> list[EventRow]:
+    """
+    Return a page of the user's stored events (recurring ones aren't expanded).
+
+    Ordered by (start, id), pass those of the last event of a page as `after`
+    to get the next one.
+    """
+    result = await db.execute(
+        _events_page(select(*EVENT_COLUMNS).where(Event.username == username), after, limit)
+    )
+    return [EventRow(*row) for row in result]
+
+
+async def get_all_event_details(
+    db: AsyncSession,
+    username: str,
+    include: Iterable[PlannableRelation],
+    after: Cursor | None = None,
+    limit: int = DefaultPagination.page_size,
+) -> list[Event]:
+    """Same as `get_all_events`, but with the given relationships of the events loaded."""
+    query = (
+        select(Event)
+        .options(*plannable_loader_options(Event, include))
+        .where(Event.username == username)
+    )
+    result = await db.scalars(_events_page(query, after, limit))
+    return list(result)
+
+
+async def get_events_from_task(db: AsyncSession, task_id: int) -> list[EventRow]:
+    """Return all events of a task (by start)."""
+    result = await db.execute(
+        select(*EVENT_COLUMNS).where(Event.task_id == task_id).order_by(Event.start, Event.id)
+    )
+    return [EventRow(*row) for row in result]
+
+
+async def create_events(
+    db: AsyncSession,
+    username: str,
+    events: list[EventCreate],
+) -> list[Event] | None:
+    """
+    Insert standalone events for a user in one statement (per table), in the
+    given order, or return None if the user doesn't exist.
+    """
+    if await db.get(User, username) is None:
+        return None
+    if not events:
+        return []
+
+    result = await db.scalars(
+        insert(Event).returning(Event, sort_by_parameter_order=True),
+        [
+            {
+                "username": username,
+                "title": event.title,
+                "description": event.description,
+                "priority": event.priority,
+                "start": to_naive_utc(event.start),
+                "end": to_naive_utc(event.end),
+            }
+            for event in events
+        ],
+    )
+    return list(result)
+
+
+async def move_events(
+    db: AsyncSession,
+    username: str,
+    moves: list[EventMove],
+) -> list[EventRow]:
+    """
+    Set new start/end times of many events with a single UPDATE ... FROM (VALUES ...).
 
-def edit_task_event(eventID: int, new_start: datetime, new_end: datetime, db: Session) -> dict:
-    """Update the start and end time of a task event."""
-    raise NotImplementedError
+    Only the user's own events are touched; the moved ones are returned
+    (unknown IDs are skipped rather than failing the whole batch).
+    """
+    if not moves:
+        return []
 
-    event = db.query(Event).filter(Event.id == eventID).first()
-    if event is None:
-        return {"success": False, "message": "Event not found"}
+    new_times = values(
+        column("id", Integer),
+        column("start", DateTime),
+        column("end", DateTime),
+        name="new_times",
+    ).data([(move.id, to_naive_utc(move.start), to_naive_utc(move.end)) for move in moves])
 
-    event.start = new_start
-    event.end = new_end
-    db.commit()
+    result = await db.execute(
+        update(_event_table)
+        .where(
+            _event_table.c.id == new_times.c.id,
+            _event_table.c.username == username,
+            _plannable_table.c.id == _event_table.c.id,
+        )
+        .values(start=new_times.c.start, end=new_times.c.end)
+        .returning(*EVENT_COLUMNS)
+    )
+    return [EventRow(*row) for row in result]
 
-    return {"success": True}
 
+async def delete_events(db: AsyncSession, username: str, event_ids: list[int]) -> list[int]:
+    """Delete many of the user's events with a single statement and return the deleted IDs."""
+    if not event_ids:
+        return []
 
-def get_events_from_task(taskID: int, db: Session) -> dict:
-    """Return all events belonging to a given task."""
-    raise NotImplementedError
+    return await _delete_plannables(
+        db,
+        select(Event.id).where(Event.id.in_(event_ids), Event.username == username),
+    )
 
-    tasks = db.query(Task).filter(Task.id == taskID).first()
-    if tasks is None:
-        return {"events": []}
 
+async def delete_events_from_task(db: AsyncSession, task_id: int) -> list[int]:
+    """Delete every event of a task with a single statement and return the deleted IDs."""
+    return await _delete_plannables(db, select(Event.id).where(Event.task_id == task_id))
 
-def delete_events_from_task(taskID: int, db: Session) -> dict:
-    """Delete all events associated with the given task ID."""
-    raise NotImplementedError
 
-    events = db.query(Event).filter(Event.id == taskID)
-    events.delete()
-    db.commit()
+def _events_page(query: Select, after: Cursor | None, limit: int) -> Select:
+    if after is not None:
+        query = query.where(tuple_(Event.start, Event.id) > tuple_(*map(literal, after)))
+    return query.order_by(Event.start, Event.id).limit(limit)
 
-    return {"success": True}
 
+def _overlapping(username: str, start: datetime, end: datetime) -> tuple:
+    """Filter for the user's events overlapping [start, end) (served by the range index)."""
+    start, end = to_naive_utc(start), to_naive_utc(end)
+    return (Event.username == username, Event.start < end, Event.end > start)
 
-def delete_task_event(eventID: int, db: Session) -> dict:
-    """Delete a specific event by its ID."""
-    raise NotImplementedError
 
-    event = db.query(Event).filter(Event.id == eventID).first()
-    if event is None:
-        return {"success": False, "message": "Event not found"}
+def _recurring_overlapping(username: str, start: datetime, end: datetime) -> tuple:
+    """Filter for the user's (event, recurrence) pairs whose series can overlap [start, end)."""
+    start, end = to_aware_utc(start), to_aware_utc(end)
+    return (
+        Event.username == username,
+        Recurrence.start < end,
+        or_(
+            Recurrence.until.is_(None),
+            Recurrence.until + (Event.end - Event.start) > start,
+        ),
+    )
 
-    db.delete(event)
-    db.commit()
 
-    return {"success": True}
+async def _delete_plannables(db: AsyncSession, ids: Select) -> list[int]:
+    # Deleting the `plannable` rows cascades to `event` (and recurrences) in the DB.
+    result = await db.scalars(
+        delete(Plannable)
+        .where(Plannable.id.in_(ids))
+        .returning(Plannable.id)
+        .execution_options(synchronize_session=False)
+    )
+    return list(result)
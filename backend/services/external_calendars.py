@@ -0,0 +1,391 @@
+import hashlib
+import re
+import tempfile
+import zoneinfo
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import IO
+
+import httpx
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import Event, ExternalCalendar, Plannable, Recurrence
+from backend.misc.logger import get_logger
+from backend.misc.recurrence import RecurrenceFrequency
+from backend.services.recurrence import nth_occurrence_date
+from backend.services.time import load_user_timezone
+from backend.tools.calendar_to_events import ParsedEvent, VEventParser, parse_ical_time
+
+log = get_logger(__name__)
+
+# Number of parsed VEVENTs held in memory before they are written.
+IMPORT_BATCH_SIZE = 500
+# Seconds to wait for the calendar provider (per network operation, not in total).
+FETCH_TIMEOUT = 30
+# Bytes read from a feed at a time.
+READ_CHUNK_SIZE = 64 * 1024
+# Feeds larger than this are spooled to disk (rather than memory) before parsing.
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+_RRULE_FREQUENCIES = {
+    "DAILY": RecurrenceFrequency.DAILY,
+    "WEEKLY": RecurrenceFrequency.WEEKLY,
+    "MONTHLY": RecurrenceFrequency.MONTHLY,
+    "YEARLY": RecurrenceFrequency.ANNUALLY,
+}
+# RRULE parts that `Recurrence` can represent.
+_SUPPORTED_RRULE_PARTS = {"FREQ", "INTERVAL", "UNTIL", "COUNT", "WKST"}
+
+
+@dataclass
+class SyncResult:
+    """
+    What a sync did to the calendar's events.
+    """
+
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    unchanged: int = 0
+    # True if the feed wasn't parsed at all (not modified, or same content).
+    skipped: bool = False
+
+
+@dataclass
+class _Feed:
+    etag: str | None
+    last_modified: str | None
+    chunks: AsyncIterator[bytes]
+
+
+async def create_external_calendar(
+    db: AsyncSession,
+    username: str,
+    provider: str,
+    url: str | None,
+) -> ExternalCalendar:
+    """Register an external calendar for a user (without importing anything yet)."""
+    calendar = ExternalCalendar(username=username, provider=provider, url=url)
+    db.add(calendar)
+    await db.flush()
+    return calendar
+
+
+async def sync_calendar(
+    db: AsyncSession,
+    calendar: ExternalCalendar,
+    client: httpx.AsyncClient | None = None,
+) -> SyncResult:
+    """
+    Bring the calendar's events up to date with its feed, doing as little work as possible.
+
+    The feed is requested conditionally (ETag/Last-Modified), and if the
+    provider doesn't support that, its content hash is compared with the last
+    one before parsing anything. Otherwise only the VEVENTs that changed are
+    written (see `import_calendar`). Feeds are fetched with `client` if given
+    (e.g., one with an `httpx.MockTransport` in tests).
+    """
+    if calendar.url is None:
+        raise ValueError(f"External calendar {calendar.id} has no URL.")
+
+    digest = hashlib.sha256()
+    # The feed is hashed while it's downloaded, and only parsed if the hash changed.
+    # Large feeds are spooled to disk, so memory use stays bounded either way.
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+        async with _open_feed(calendar, client) as feed:
+            calendar.last_synced_at = datetime.now(timezone.utc)
+            if feed is None:
+                log.debug("External calendar %s not modified.", calendar.id)
+                return SyncResult(skipped=True)
+
+            async for chunk in feed.chunks:
+                digest.update(chunk)
+                spool.write(chunk)
+            calendar.etag, calendar.last_modified = feed.etag, feed.last_modified
+
+        content_hash = digest.hexdigest()
+        if content_hash == calendar.content_hash:
+            log.debug("External calendar %s has the same content.", calendar.id)
+            return SyncResult(skipped=True)
+
+        spool.seek(0)
+        result = await import_calendar(db, calendar, _iter_file(spool))
+        calendar.content_hash = content_hash
+
+    return result
+
+
+async def import_calendar(
+    db: AsyncSession,
+    calendar: ExternalCalendar,
+    chunks: AsyncIterator[bytes],
+) -> SyncResult:
+    """
+    Update the calendar's events to match the streamed .ics feed.
+
+    Events are matched by UID: new ones are inserted, changed ones (by
+    fingerprint) updated, and the ones missing from the feed deleted, in
+    batches of IMPORT_BATCH_SIZE. Unchanged events aren't written at all.
+
+    Recurring events are written last, once all the occurrences overridden by
+    other VEVENTs (RECURRENCE-ID) are known, and exclude those occurrences
+    (series are few, so they're held in memory until the end of the feed).
+    """
+    zone = await load_user_timezone(db, calendar.username)
+    known = await get_calendar_fingerprints(db, calendar.id)
+
+    parser = VEventParser(zone)
+    seen: set[str] = set()
+    result = SyncResult()
+    batch: list[ParsedEvent] = []
+    series: list[ParsedEvent] = []
+    overridden: dict[str, set[datetime]] = defaultdict(set)
+
+    async for chunk in chunks:
+        batch.extend(_set_series_aside(parser.feed(chunk), series, overridden))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await _apply_batch(db, calendar, batch, known, seen, result, zone)
+            batch = []
+
+    batch.extend(_set_series_aside(parser.close(), series, overridden))
+    batch.extend(
+        replace(event, excluded=tuple(sorted({*event.excluded, *overridden[event.uid]})))
+        for event in series
+    )
+    for start in range(0, len(batch), IMPORT_BATCH_SIZE):
+        await _apply_batch(
+            db, calendar, batch[start : start + IMPORT_BATCH_SIZE], known, seen, result, zone
+        )
+
+    removed = [event_id for uid, (event_id, _) in known.items() if uid not in seen]
+    if removed:
+        await db.execute(
+            delete(Plannable)
+            .where(Plannable.id.in_(removed))
+            .execution_options(synchronize_session=False)
+        )
+    result.deleted = len(removed)
+
+    log.info("Synced external calendar %s: %s.", calendar.id, result)
+    return result
+
+
+def _set_series_aside(
+    events: Iterable[ParsedEvent],
+    series: list[ParsedEvent],
+    overridden: dict[str, set[datetime]],
+) -> list[ParsedEvent]:
+    """Move the recurring events to `series`, note overridden occurrences, return the rest."""
+    rest: list[ParsedEvent] = []
+    for event in events:
+        if event.series_uid is not None and event.original_start is not None:
+            overridden[event.series_uid].add(event.original_start)
+        if event.rrule is not None:
+            series.append(event)
+        else:
+            rest.append(event)
+    return rest
+
+
+async def get_calendar_fingerprints(
+    db: AsyncSession,
+    calendar_id: int,
+) -> dict[str, tuple[int, str | None]]:
+    """Return the calendar's events as {UID: (event ID, fingerprint)}."""
+    result = await db.execute(
+        select(Event.external_uid, Event.id, Event.external_hash).where(
+            Event.external_calendar_id == calendar_id
+        )
+    )
+    return {uid: (event_id, fingerprint) for uid, event_id, fingerprint in result if uid}
+
+
+async def _apply_batch(
+    db: AsyncSession,
+    calendar: ExternalCalendar,
+    batch: list[ParsedEvent],
+    known: dict[str, tuple[int, str | None]],
+    seen: set[str],
+    result: SyncResult,
+    zone: zoneinfo.ZoneInfo,
+) -> None:
+    new: list[ParsedEvent] = []
+    changed: list[tuple[int, ParsedEvent]] = []
+    for event in batch:
+        if event.uid in seen:
+            continue  # Duplicate UID within the feed, keep the first one.
+        seen.add(event.uid)
+
+        if event.uid not in known:
+            new.append(event)
+        elif known[event.uid][1] != event.fingerprint():
+            changed.append((known[event.uid][0], event))
+        else:
+            result.unchanged += 1
+
+    if new:
+        result.created += await insert_calendar_events(db, calendar, new, zone)
+    if changed:
+        result.updated += await update_calendar_events(db, changed, zone)
+
+
+async def insert_calendar_events(
+    db: AsyncSession,
+    calendar: ExternalCalendar,
+    events: list[ParsedEvent],
+    zone: zoneinfo.ZoneInfo,
+) -> int:
+    """Bulk-insert parsed events (and their recurrences) without creating ORM objects."""
+    ids = await db.scalars(
+        insert(Event).returning(Event.id, sort_by_parameter_order=True),
+        [
+            {
+                "username": calendar.username,
+                "external_calendar_id": calendar.id,
+                "external_uid": event.uid,
+                "external_hash": event.fingerprint(),
+                "title": event.title,
+                "description": event.description,
+                "priority": 0,
+                "start": event.start,
+                "end": event.end,
+            }
+            for event in events
+        ],
+    )
+
+    recurrences = [
+        {"plannable_id": event_id, **values}
+        for event_id, event in zip(ids, events)
+        if (values := get_recurrence_values(event, zone)) is not None
+    ]
+    if recurrences:
+        await db.execute(insert(Recurrence), recurrences)
+
+    return len(events)
+
+
+async def update_calendar_events(
+    db: AsyncSession,
+    changed: list[tuple[int, ParsedEvent]],
+    zone: zoneinfo.ZoneInfo,
+) -> int:
+    """Bulk-update existing events (by ID) to the new content of their VEVENTs."""
+    await db.execute(
+        update(Event),
+        [
+            {
+                "id": event_id,
+                "external_hash": event.fingerprint(),
+                "title": event.title,
+                "description": event.description,
+                "start": event.start,
+                "end": event.end,
+            }
+            for event_id, event in changed
+        ],
+    )
+
+    # Recurrences are simply replaced, as they're rare and tiny.
+    await db.execute(
+        delete(Recurrence)
+        .where(Recurrence.plannable_id.in_([event_id for event_id, _ in changed]))
+        .execution_options(synchronize_session=False)
+    )
+    recurrences = [
+        {"plannable_id": event_id, **values}
+        for event_id, event in changed
+        if (values := get_recurrence_values(event, zone)) is not None
+    ]
+    if recurrences:
+        await db.execute(insert(Recurrence), recurrences)
+
+    return len(changed)
+
+
+def get_recurrence_values(event: ParsedEvent, zone: zoneinfo.ZoneInfo) -> dict | None:
+    """
+    Convert a VEVENT's RRULE into `Recurrence` column values.
+
+    Rules that `Recurrence` can't express (e.g., BYDAY=MO,WE) return None,
+    so only the first occurrence of such series is imported.
+    """
+    rrule = event.rrule
+    if rrule is None:
+        return None
+
+    frequency = _RRULE_FREQUENCIES.get(rrule.get("FREQ", "").upper())
+    if frequency is None or not set(rrule) <= _SUPPORTED_RRULE_PARTS:
+        log.debug("Unsupported RRULE of VEVENT %s: %s", event.uid, rrule)
+        return None
+
+    # The series repeats in its DTSTART's zone, e.g. a 09:00 Europe/London
+    # meeting stays at 09:00 London time for users in other zones.
+    if event.timezone is not None:
+        zone = zoneinfo.ZoneInfo(event.timezone)
+    start = event.start.replace(tzinfo=timezone.utc)
+    interval = int(rrule.get("INTERVAL", "1"))
+    until: datetime | None = None
+    if "UNTIL" in rrule:
+        until = parse_ical_time(rrule["UNTIL"], None, zone)[0].replace(tzinfo=timezone.utc)
+    elif "COUNT" in rrule:
+        local_start = start.astimezone(zone)
+        last_date = nth_occurrence_date(
+            local_start.date(), int(rrule["COUNT"]) - 1, frequency, interval
+        )
+        until = datetime.combine(last_date, local_start.time(), tzinfo=zone)
+
+    return {
+        "start": start,
+        "until": until,
+        "frequency": frequency,
+        "interval": interval,
+        "excluded": [moment.replace(tzinfo=timezone.utc) for moment in event.excluded] or None,
+        "timezone": event.timezone,
+    }
+
+
+@asynccontextmanager
+async def _open_feed(
+    calendar: ExternalCalendar,
+    client: httpx.AsyncClient | None,
+) -> AsyncIterator[_Feed | None]:
+    """Open the calendar's feed, or yield None if it wasn't modified since the last sync."""
+    url = calendar.url or ""
+    headers = {}
+    if calendar.etag:
+        headers["If-None-Match"] = calendar.etag
+    if calendar.last_modified:
+        headers["If-Modified-Since"] = calendar.last_modified
+
+    async with AsyncExitStack() as stack:
+        if client is None:
+            client = await stack.enter_async_context(
+                httpx.AsyncClient(timeout=FETCH_TIMEOUT, follow_redirects=True)
+            )
+        # `webcal://` is just a hint for calendar apps, the feed is served over HTTP(S).
+        url = re.sub(r"^webcal://", "https://", url)
+        response = await stack.enter_async_context(client.stream("GET", url, headers=headers))
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            yield None
+            return
+
+        response.raise_for_status()
+        yield _Feed(
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            chunks=response.aiter_bytes(READ_CHUNK_SIZE),
+        )
+
+
+async def _iter_file(file: IO[bytes]) -> AsyncIterator[bytes]:
+    """Yield the contents of a binary file in chunks."""
+    while True:
+        chunk = file.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
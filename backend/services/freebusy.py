@@ -0,0 +1,59 @@
+from collections.abc import Collection
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.services.events import get_busy_times
+from backend.services.scheduler import get_working_hours
+from backend.services.time import load_user_timezones, to_naive_utc
+from backend.tools.free_slots import Interval
+from backend.tools.interval_set import IntervalSet
+
+# Longest window that can be queried at once (recurring events are expanded over it).
+MAX_WINDOW = timedelta(days=366)
+# Most users whose common free time can be looked up at once.
+MAX_USERS = 50
+
+
+async def get_busy(
+    db: AsyncSession,
+    username: str,
+    start: datetime,
+    end: datetime,
+) -> list[Interval]:
+    """
+    Return when the user is busy in [start, end), as sorted, disjoint intervals.
+
+    Every kind of event counts (task events, standalone, recurring and imported
+    ones), and overlapping/touching events are merged into one interval.
+    """
+    return list(IntervalSet.from_intervals(await get_busy_times(db, username, start, end)))
+
+
+async def get_common_free_slots(
+    db: AsyncSession,
+    usernames: Collection[str],
+    start: datetime,
+    end: datetime,
+    min_duration: timedelta = timedelta(),
+    working_hours_only: bool = False,
+) -> list[Interval]:
+    """
+    Return the slots in [start, end) when none of the users are busy.
+
+    With `working_hours_only`, slots are also limited to the working hours
+    of every user (in their own timezones). Slots shorter than
+    `min_duration` are left out.
+    """
+    allowed = IntervalSet.from_intervals([(to_naive_utc(start), to_naive_utc(end))])
+    if working_hours_only:
+        zones = await load_user_timezones(db, usernames)
+        for zone in set(zones.values()):
+            allowed &= IntervalSet.from_intervals(get_working_hours(start, end, zone))
+
+    busy: list[Interval] = []
+    for username in set(usernames):
+        busy.extend(await get_busy_times(db, username, start, end))
+
+    free = allowed - IntervalSet.from_intervals(busy)
+    return list(free.longer_than(min_duration))
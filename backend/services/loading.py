@@ -0,0 +1,34 @@
+from collections.abc import Iterable
+
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from backend.database import Plannable, Task
+from backend.misc.loading import PlannableRelation
+
+
+def plannable_loader_options(
+    entity: type[Plannable],
+    include: Iterable[PlannableRelation],
+) -> list[LoaderOption]:
+    """
+    Return the loader options that fetch the given relationships of `entity` up front.
+
+    Each relationship is loaded with `selectinload`, i.e., one extra
+    `SELECT ... WHERE id IN (...)` for the whole result rather than one
+    query per row, so a listing costs the same number of queries whatever
+    its size. Relationships not included are left unloaded.
+    """
+    options: list[LoaderOption] = []
+    for relation in set(include):
+        if relation == PlannableRelation.TAGS:
+            options.append(selectinload(entity.tags))
+        elif relation == PlannableRelation.RECURRENCE:
+            options.append(selectinload(entity.recurrence))
+        elif relation == PlannableRelation.EXTERNAL_CALENDAR:
+            options.append(selectinload(entity.external_calendar))
+        elif relation == PlannableRelation.EVENTS:
+            if not issubclass(entity, Task):
+                raise ValueError(f"`{relation.value}` can only be included for tasks.")
+            options.append(selectinload(entity.events))
+    return options
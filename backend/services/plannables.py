@@ -0,0 +1,117 @@
+from collections.abc import Collection
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import Select, and_, exists, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import Event, Plannable, PlannableTag, Tag, Task
+
+# Upper bound on the number of plannables a single search returns.
+SEARCH_LIMIT = 500
+
+_task_table = Task.__table__
+_event_table = Event.__table__
+
+
+class PlannableRow(NamedTuple):
+    """
+    Read-only view of a task or event as returned by search.
+    """
+
+    id: int
+    type: str
+    title: str
+    description: str
+    priority: int
+    is_completed: bool | None
+    # Only set for tasks.
+    deadline: datetime | None
+    # Only set for events.
+    start: datetime | None
+    end: datetime | None
+
+
+async def search_plannables(
+    db: AsyncSession,
+    username: str,
+    *,
+    all_tags: Collection[str] = (),
+    any_tags: Collection[str] = (),
+    no_tags: Collection[str] = (),
+    text: str | None = None,
+    priorities: Collection[int] = (),
+    is_completed: bool | None = None,
+    plannable_type: str | None = None,
+    limit: int = SEARCH_LIMIT,
+) -> list[PlannableRow]:
+    """
+    Return the user's plannables matching every given filter, newest first.
+
+    Tags are matched by name: the plannable must have all of `all_tags`, at
+    least one of `any_tags` and none of `no_tags`. `text` is searched for
+    (case-insensitively) in the title and description.
+
+    Tag filters are resolved through the `(tag_id, plannable_id)` index and
+    text through the trigram indexes, so neither scans the user's plannables.
+    """
+    query = (
+        select(
+            Plannable.id,
+            Plannable.type,
+            Plannable.title,
+            Plannable.description,
+            Plannable.priority,
+            Plannable.is_completed,
+            _task_table.c.deadline,
+            _event_table.c.start,
+            _event_table.c.end,
+        )
+        .outerjoin(_task_table, _task_table.c.id == Plannable.id)
+        .outerjoin(_event_table, _event_table.c.id == Plannable.id)
+        .where(Plannable.username == username)
+    )
+
+    if all_tags:
+        tagged_with_all = (
+            _tagged(username, all_tags)
+            .group_by(PlannableTag.plannable_id)
+            .having(func.count(PlannableTag.tag_id) == len(set(all_tags)))
+        )
+        query = query.where(Plannable.id.in_(tagged_with_all))
+    if any_tags:
+        query = query.where(Plannable.id.in_(_tagged(username, any_tags)))
+    if no_tags:
+        query = query.where(
+            ~exists(_tagged(username, no_tags).where(PlannableTag.plannable_id == Plannable.id))
+        )
+    if text:
+        pattern = f"%{_escape_like(text)}%"
+        query = query.where(
+            or_(
+                Plannable.title.ilike(pattern, escape="\\"),
+                Plannable.description.ilike(pattern, escape="\\"),
+            )
+        )
+    if priorities:
+        query = query.where(Plannable.priority.in_(priorities))
+    if is_completed is not None:
+        query = query.where(Plannable.is_completed.is_(is_completed))
+    if plannable_type is not None:
+        query = query.where(Plannable.type == plannable_type)
+
+    result = await db.execute(query.order_by(Plannable.id.desc()).limit(limit))
+    return [PlannableRow(*row) for row in result]
+
+
+def _tagged(username: str, names: Collection[str]) -> Select[tuple[int]]:
+    """Select the IDs of plannables having any of the user's tags with the given names."""
+    return (
+        select(PlannableTag.plannable_id)
+        .join(Tag, and_(Tag.id == PlannableTag.tag_id, Tag.username == username))
+        .where(Tag.name.in_(set(names)))
+    )
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
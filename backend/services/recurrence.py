@@ -0,0 +1,235 @@
+import calendar
+import threading
+import time
+import zoneinfo
+from collections import OrderedDict
+from collections.abc import Iterator
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Mapper, Session, object_session
+
+from backend.database import Recurrence
+from backend.misc.logger import get_logger
+from backend.misc.recurrence import RecurrenceFrequency
+from backend.services.time import to_aware_utc
+
+log = get_logger(__name__)
+
+# Upper bound on the number of cached (recurrence, window) expansions.
+OCCURRENCE_CACHE_SIZE = 4096
+# Seconds before a cached expansion is recomputed (even if it wasn't invalidated).
+OCCURRENCE_CACHE_TTL = 60
+# Key of `Session.info` that collects recurrences edited in the transaction.
+_STALE_RECURRENCES_KEY = "stale_recurrences"
+
+
+class Occurrence(NamedTuple):
+    start: datetime
+    end: datetime
+
+
+class RecurrenceRow(NamedTuple):
+    """
+    Read-only view of a `Recurrence`, with just what expansion needs.
+    """
+
+    id: int
+    start: datetime
+    until: datetime | None
+    frequency: str
+    interval: int
+    excluded: list[datetime] | None
+    timezone: str | None
+
+
+def get_series_zone(
+    recurrence: Recurrence | RecurrenceRow,
+    user_zone: zoneinfo.ZoneInfo,
+) -> zoneinfo.ZoneInfo:
+    """Return the zone a series repeats in: its own (if any), else its user's."""
+    if recurrence.timezone is None:
+        return user_zone
+    return zoneinfo.ZoneInfo(recurrence.timezone)
+
+
+def iter_occurrences(
+    recurrence: Recurrence | RecurrenceRow,
+    duration: timedelta,
+    zone: zoneinfo.ZoneInfo,
+    window_start: datetime,
+    window_end: datetime,
+) -> Iterator[Occurrence]:
+    """
+    Lazily yield the occurrences of a series that overlap [window_start, window_end).
+
+    Occurrences keep the series' wall-clock time in its zone (`zone`, the
+    user's, unless the series has its own), so they don't drift across DST
+    changes. Monthly/annual series anchored on a day that a month lacks (e.g.,
+    the 31st, or Feb 29) fall on that month's last day instead.
+    Excluded occurrences are skipped. Expansion starts near the window, never
+    at the beginning of the series.
+    """
+    zone = get_series_zone(recurrence, zone)
+    window_start, window_end = to_aware_utc(window_start), to_aware_utc(window_end)
+    anchor = to_aware_utc(recurrence.start).astimezone(zone)
+    until = to_aware_utc(recurrence.until) if recurrence.until is not None else None
+    frequency = RecurrenceFrequency(recurrence.frequency)
+    interval = max(recurrence.interval, 1)
+    excluded = {to_aware_utc(moment) for moment in recurrence.excluded or ()}
+
+    # The earliest occurrence that can still overlap the window starts after this.
+    earliest = (window_start - duration).astimezone(zone).date()
+    index = _first_candidate_index(anchor.date(), earliest, frequency, interval)
+
+    while True:
+        local_date = nth_occurrence_date(anchor.date(), index, frequency, interval)
+        start = datetime.combine(local_date, anchor.time(), tzinfo=zone)
+        if start >= window_end or (until is not None and start > until):
+            return
+
+        end = start + duration
+        if end > window_start and start not in excluded:
+            yield Occurrence(start, end)
+        index += 1
+
+
+def _first_candidate_index(
+    anchor: date,
+    earliest: date,
+    frequency: RecurrenceFrequency,
+    interval: int,
+) -> int:
+    """Return an occurrence index at or just before the first one on/after `earliest`."""
+    if frequency in (RecurrenceFrequency.DAILY, RecurrenceFrequency.WEEKLY):
+        step_days = interval * (7 if frequency == RecurrenceFrequency.WEEKLY else 1)
+        steps = (earliest - anchor).days // step_days
+    else:
+        step_months = interval * (12 if frequency == RecurrenceFrequency.ANNUALLY else 1)
+        months = (earliest.year - anchor.year) * 12 + (earliest.month - anchor.month)
+        steps = months // step_months
+
+    # Step back once more to account for DST shifts and clamped month ends.
+    return max(steps - 1, 0)
+
+
+def nth_occurrence_date(
+    anchor: date,
+    index: int,
+    frequency: RecurrenceFrequency,
+    interval: int,
+) -> date:
+    """Return the local date of the `index`-th (from 0) occurrence of a series from `anchor`."""
+    if frequency == RecurrenceFrequency.DAILY:
+        return anchor + timedelta(days=index * interval)
+    if frequency == RecurrenceFrequency.WEEKLY:
+        return anchor + timedelta(weeks=index * interval)
+
+    step_months = interval * (12 if frequency == RecurrenceFrequency.ANNUALLY else 1)
+    year, month = divmod(anchor.month - 1 + index * step_months, 12)
+    year, month = anchor.year + year, month + 1
+    # Always clamp from the anchor day, so that Jan 31 -> Feb 28 -> Mar 31.
+    day = min(anchor.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+class OccurrenceCache:
+    """
+    Thread-safe LRU cache of expanded windows keyed by recurrence ID.
+
+    Every entry of a recurrence can be dropped at once when the series is edited
+    (see the listeners below). NOTE: Each worker process has its own, and only
+    sees the ORM writes it commits itself, so entries expire `ttl` seconds
+    after being expanded to pick up other processes' (and Core statements') writes.
+    """
+
+    def __init__(
+        self,
+        max_size: int = OCCURRENCE_CACHE_SIZE,
+        ttl: float = OCCURRENCE_CACHE_TTL,
+    ) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        # Key -> (occurrences, monotonic time at which they expire).
+        self._entries: OrderedDict[tuple, tuple[tuple[Occurrence, ...], float]] = OrderedDict()
+        self._keys_by_recurrence: dict[int, set[tuple]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_expand(
+        self,
+        recurrence: Recurrence | RecurrenceRow,
+        duration: timedelta,
+        zone: zoneinfo.ZoneInfo,
+        window_start: datetime,
+        window_end: datetime,
+    ) -> tuple[Occurrence, ...]:
+        """Return the occurrences overlapping the window, expanding them on a miss."""
+        # Series with their own zone expand the same for every user zone.
+        series_zone = get_series_zone(recurrence, zone)
+        key = (recurrence.id, window_start, window_end, series_zone.key, duration)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        occurrences = tuple(
+            iter_occurrences(recurrence, duration, series_zone, window_start, window_end)
+        )
+
+        with self._lock:
+            self._entries[key] = (occurrences, time.monotonic() + self._ttl)
+            self._entries.move_to_end(key)
+            self._keys_by_recurrence.setdefault(recurrence.id, set()).add(key)
+            while len(self._entries) > self._max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                self._discard_key(evicted)
+
+        return occurrences
+
+    def invalidate(self, *recurrence_ids: int) -> None:
+        """Drop every cached window of the given recurrences."""
+        with self._lock:
+            for recurrence_id in recurrence_ids:
+                for key in self._keys_by_recurrence.pop(recurrence_id, set()):
+                    self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_recurrence.clear()
+
+    def _discard_key(self, key: tuple) -> None:
+        keys = self._keys_by_recurrence.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_recurrence[key[0]]
+
+
+occurrence_cache = OccurrenceCache()
+
+
+@sa_event.listens_for(Recurrence, "after_update")
+@sa_event.listens_for(Recurrence, "after_delete")
+def _record_edited_recurrence(_: Mapper, __: object, recurrence: Recurrence) -> None:
+    # Dropped right away (for the rest of this transaction), and again once it ends,
+    # so that nothing expanded meanwhile from the old (or rolled back) series stays cached.
+    occurrence_cache.invalidate(recurrence.id)
+    session = object_session(recurrence)
+    if session is not None:
+        session.info.setdefault(_STALE_RECURRENCES_KEY, set()).add(recurrence.id)
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _invalidate_committed_recurrences(session: Session) -> None:
+    recurrence_ids = session.info.pop(_STALE_RECURRENCES_KEY, ())
+    if recurrence_ids:
+        log.debug("Invalidating cached occurrences of recurrences %s.", recurrence_ids)
+        occurrence_cache.invalidate(*recurrence_ids)
+
+
+@sa_event.listens_for(Session, "after_soft_rollback")
+def _invalidate_rolled_back_recurrences(session: Session, _: object) -> None:
+    occurrence_cache.invalidate(*session.info.pop(_STALE_RECURRENCES_KEY, ()))
@@ -0,0 +1,373 @@
+import zoneinfo
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import Event, Task
+from backend.misc.defaults import DefaultSchedulerSettings
+from backend.misc.logger import get_logger
+from backend.services.daily_load import add_booked_time, day_bounds, get_daily_load
+from backend.services.events import get_busy_times, get_event_occurrences
+from backend.services.time import to_aware_utc, to_naive_utc
+from backend.tools.free_slots import FreeSlots, Interval
+from backend.tools.instrumentation import timed_calls
+from backend.tools.interval_set import IntervalSet
+
+log = get_logger(__name__)
+
+
+@dataclass
+class ScheduleDiff:
+    """
+    Events touched by a (re)scheduling run.
+    """
+
+    moved: list[Event] = field(default_factory=list)
+    created: list[Event] = field(default_factory=list)
+    deleted: list[int] = field(default_factory=list)
+
+
+def get_working_hours(
+    start: datetime,
+    end: datetime,
+    zone: zoneinfo.ZoneInfo,
+) -> list[Interval]:
+    """Return the working hours (as naive UTC intervals) of every local day in [start, end)."""
+    start, end = to_aware_utc(start), to_aware_utc(end)
+    day = start.astimezone(zone).date()
+    last_day = end.astimezone(zone).date()
+
+    settings = DefaultSchedulerSettings
+    hours: list[Interval] = []
+    while day <= last_day:
+        day_start = datetime.combine(day, settings.working_hours_start, tzinfo=zone)
+        day_end = datetime.combine(day, settings.working_hours_end, tzinfo=zone)
+        clipped_start, clipped_end = max(day_start, start), min(day_end, end)
+        if clipped_start < clipped_end:
+            hours.append((to_naive_utc(clipped_start), to_naive_utc(clipped_end)))
+        day += timedelta(days=1)
+
+    return hours
+
+
+async def get_free_slots(
+    db: AsyncSession,
+    username: str,
+    start: datetime,
+    end: datetime,
+    zone: zoneinfo.ZoneInfo,
+) -> FreeSlots:
+    """Return the user's free working time in [start, end), around their existing events."""
+    busy = await get_busy_times(db, username, start, end)
+    return free_between(get_working_hours(start, end, zone), busy)
+
+
+def free_between(allowed: list[Interval], busy: list[Interval]) -> FreeSlots:
+    """Return the `allowed` time not covered by `busy` time (computed in bulk)."""
+    free = IntervalSet.from_intervals(allowed) - IntervalSet.from_intervals(busy)
+    return FreeSlots(free)
+
+
+def place_task(
+    free_slots: FreeSlots,
+    duration: timedelta,
+    not_before: datetime,
+    deadline: datetime,
+) -> list[Interval]:
+    """
+    Reserve free time for a task, as early as possible before its deadline.
+
+    Long tasks are first spread over several slots (one chunk per slot); if
+    that doesn't fit before the deadline, the remainder fills whatever time is left.
+    """
+    not_before, deadline = to_naive_utc(not_before), to_naive_utc(deadline)
+    chunks = free_slots.place(
+        duration,
+        not_before,
+        deadline,
+        DefaultSchedulerSettings.min_chunk,
+        DefaultSchedulerSettings.max_chunk,
+    )
+
+    placed = sum((end - start for start, end in chunks), timedelta())
+    if placed < duration:
+        chunks += free_slots.place(duration - placed, not_before, deadline, timedelta())
+
+    return _merge_adjacent(sorted(chunks))
+
+
+def place_task_avoiding(
+    free_slots: FreeSlots,
+    avoid: list[Interval],
+    duration: timedelta,
+    not_before: datetime,
+    deadline: datetime,
+) -> list[Interval]:
+    """
+    Like `place_task`, but only use the `avoid` time (e.g., busy days) for whatever
+    doesn't fit into the rest of the free time before the deadline.
+    """
+    chunks = place_task(free_between(list(free_slots), avoid), duration, not_before, deadline)
+    for start, end in chunks:
+        free_slots.reserve(start, end)
+
+    placed = sum((end - start for start, end in chunks), timedelta())
+    if placed < duration:
+        chunks += place_task(free_slots, duration - placed, not_before, deadline)
+
+    return _merge_adjacent(sorted(chunks))
+
+
+def get_busy_days(booked: dict[date, timedelta], zone: zoneinfo.ZoneInfo) -> list[Interval]:
+    """Return the (naive UTC) local days already booked for at least `max_daily_load`."""
+    return [
+        day_bounds(day, zone)
+        for day, time_booked in booked.items()
+        if time_booked >= DefaultSchedulerSettings.max_daily_load
+    ]
+
+
+def _merge_adjacent(chunks: list[Interval]) -> list[Interval]:
+    merged: list[Interval] = []
+    for start, end in chunks:
+        if merged and merged[-1][1] == start:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def build_task_events(task: Task, chunks: list[Interval]) -> list[Event]:
+    """Create (unsaved) events of a task for the given time chunks."""
+    return [Event(**values) for values in task_event_values(task, chunks)]
+
+
+def task_event_values(task: Task, chunks: list[Interval]) -> list[dict[str, Any]]:
+    """Return the column values of a task's events for the given time chunks."""
+    return [
+        {
+            "username": task.username,
+            "task_id": task.id,
+            "title": task.title,
+            "description": task.description,
+            "priority": task.priority,
+            "is_completed": False,
+            "start": start,
+            "end": end,
+        }
+        for start, end in chunks
+    ]
+
+
+async def schedule_task(
+    db: AsyncSession,
+    task: Task,
+    zone: zoneinfo.ZoneInfo,
+    now: datetime | None = None,
+) -> list[Event]:
+    """Schedule a (flushed) task into the user's free time and save its events."""
+    return (await schedule_tasks(db, [task], zone, now))[task.id]
+
+
+@timed_calls("scheduler")
+async def schedule_tasks(
+    db: AsyncSession,
+    tasks: list[Task],
+    zone: zoneinfo.ZoneInfo,
+    now: datetime | None = None,
+) -> dict[int, list[Event]]:
+    """
+    Schedule (flushed) tasks of one user into their free time, and save their events.
+
+    Runs entirely in-process: the user's existing events and daily load up to the
+    latest deadline are read once, then tasks are placed earliest deadline first
+    (higher priority first on ties), each into the time left by the previous ones.
+    Days that are already busy (incl. by earlier tasks of the batch) are only used
+    for what doesn't fit elsewhere. All events are inserted in one statement.
+    Returns the events of each task, by task ID.
+    """
+    if not tasks:
+        return {}
+
+    username = tasks[0].username
+    now = to_naive_utc(now or datetime.now(zone))
+    horizon = max(now, *(to_naive_utc(task.deadline) for task in tasks))
+
+    free_slots = await get_free_slots(db, username, now, horizon, zone)
+    first_day = to_aware_utc(now).astimezone(zone).date()
+    end_day = to_aware_utc(horizon).astimezone(zone).date() + timedelta(days=1)
+    booked = {
+        load.day: load.booked for load in await get_daily_load(db, username, first_day, end_day)
+    }
+
+    values: list[dict[str, Any]] = []
+    for task in sorted(tasks, key=lambda task: (task.deadline, -task.priority, task.id)):
+        deadline = to_naive_utc(task.deadline)
+        chunks = place_task_avoiding(
+            free_slots, get_busy_days(booked, zone), task.duration, now, deadline
+        )
+        for start, end in chunks:
+            add_booked_time(booked, start, end, zone)
+
+        placed = sum((end - start for start, end in chunks), timedelta())
+        if placed < task.duration:
+            log.warning(
+                "Only %s of %s could be scheduled before the deadline of task %s.",
+                placed,
+                task.duration,
+                task.id,
+            )
+        values.extend(task_event_values(task, chunks))
+
+    events_by_task: dict[int, list[Event]] = {task.id: [] for task in tasks}
+    if values:
+        events = await db.scalars(
+            insert(Event).returning(Event, sort_by_parameter_order=True), values
+        )
+        for event in events:
+            events_by_task[event.task_id].append(event)  # type: ignore[index]
+
+    return events_by_task
+
+
+@timed_calls("scheduler")
+async def reschedule_task(
+    db: AsyncSession,
+    task: Task,
+    previous_deadline: datetime,
+    zone: zoneinfo.ZoneInfo,
+    now: datetime | None = None,
+) -> ScheduleDiff:
+    """
+    Re-place an edited task's upcoming events, moving as few other events as possible.
+
+    Only the time between now and the later of the old/new deadline is looked
+    at. Events that already started are kept and count towards the duration.
+    If the task doesn't fit into free time anymore, it takes the slots of
+    lower-priority tasks' events, which are then re-placed before their own
+    deadlines. Nothing else is moved.
+    """
+    now = to_naive_utc(now or datetime.now(zone))
+    deadline = to_naive_utc(task.deadline)
+    horizon = max(deadline, to_naive_utc(previous_deadline), now)
+
+    own_events = list(
+        await db.scalars(select(Event).where(Event.task_id == task.id).order_by(Event.start))
+    )
+    upcoming = [event for event in own_events if event.start >= now]
+    done = sum((event.end - event.start for event in own_events if event.start < now), timedelta())
+    for event in own_events:
+        event.title, event.description = task.title, task.description
+        event.priority = task.priority
+
+    occurrences = await get_event_occurrences(db, task.username, now, horizon)
+    upcoming_ids = {event.id for event in upcoming}
+    busy = [(o.start, o.end) for o in occurrences if o.event.id not in upcoming_ids]
+    free_slots = free_between(get_working_hours(now, horizon, zone), busy)
+
+    remaining = max(task.duration - done, timedelta())
+    chunks = place_task(free_slots, remaining, now, deadline)
+
+    # Not enough free time: take over lower-priority tasks' events, if that helps.
+    displaced: list[Event] = []
+    shortfall = remaining - sum((end - start for start, end in chunks), timedelta())
+    if shortfall > timedelta():
+        preemptable = [
+            o.event
+            for o in occurrences
+            if o.event.task_id not in (None, task.id)
+            and o.event.priority < task.priority
+            and o.recurrence_id is None
+            and o.start >= now
+        ]
+        # Rebuild the free time without them (rather than releasing their whole
+        # span), so parts also covered by other events or outside working hours stay busy.
+        ignored_ids = upcoming_ids | {event.id for event in preemptable}
+        free_slots = free_between(
+            get_working_hours(now, horizon, zone),
+            [(o.start, o.end) for o in occurrences if o.event.id not in ignored_ids],
+        )
+        for start, end in chunks:
+            free_slots.reserve(start, end)
+        taken = place_task(free_slots, shortfall, now, deadline)
+        chunks = _merge_adjacent(sorted(chunks + taken))
+
+        for event in preemptable:
+            if any(start < event.end and event.start < end for start, end in taken):
+                displaced.append(event)
+            else:
+                free_slots.reserve(event.start, event.end)
+
+    diff = ScheduleDiff()
+    await _apply_chunks(db, task, upcoming, chunks, diff)
+
+    displaced_by_task: dict[int, list[Event]] = defaultdict(list)
+    for event in displaced:
+        displaced_by_task[event.task_id].append(event)  # type: ignore[index]
+
+    others: list[Task] = []
+    if displaced_by_task:
+        others.extend(await db.scalars(select(Task).where(Task.id.in_(displaced_by_task))))
+    # Like new tasks, displaced ones are re-placed earliest deadline (then highest priority) first.
+    for other in sorted(others, key=lambda other: (other.deadline, -other.priority, other.id)):
+        events = displaced_by_task[other.id]
+        other_deadline = to_naive_utc(other.deadline)
+        if other_deadline > horizon:
+            await _extend_free_slots(db, free_slots, task.username, horizon, other_deadline, zone)
+            horizon = other_deadline
+
+        lost = sum((event.end - event.start for event in events), timedelta())
+        new_chunks = place_task(free_slots, lost, now, other_deadline)
+        await _apply_chunks(db, other, sorted(events, key=lambda e: e.start), new_chunks, diff)
+
+    await db.flush()
+    log.debug(
+        "Rescheduled task %s: %s moved, %s created, %s deleted.",
+        task.id,
+        len(diff.moved),
+        len(diff.created),
+        len(diff.deleted),
+    )
+
+    return diff
+
+
+async def _apply_chunks(
+    db: AsyncSession,
+    task: Task,
+    events: list[Event],
+    chunks: list[Interval],
+    diff: ScheduleDiff,
+) -> None:
+    """Move existing events onto the new chunks, creating/deleting only the difference."""
+    for event, (start, end) in zip(events, chunks):
+        if (event.start, event.end) != (start, end):
+            event.start, event.end = start, end
+            diff.moved.append(event)
+
+    created = build_task_events(task, chunks[len(events) :])
+    db.add_all(created)
+    diff.created.extend(created)
+
+    for event in events[len(chunks) :]:
+        await db.delete(event)
+        diff.deleted.append(event.id)
+
+
+async def _extend_free_slots(
+    db: AsyncSession,
+    free_slots: FreeSlots,
+    username: str,
+    start: datetime,
+    end: datetime,
+    zone: zoneinfo.ZoneInfo,
+) -> None:
+    """Add the user's free working time in [start, end) to already computed free slots."""
+    for slot_start, slot_end in get_working_hours(start, end, zone):
+        free_slots.release(slot_start, slot_end)
+    for busy_start, busy_end in await get_busy_times(db, username, start, end):
+        free_slots.reserve(busy_start, busy_end)
@@ -1,14 +1,42 @@
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from sqlalchemy.orm import Session
 
 from backend.misc.logger import get_logger
 
 log = get_logger(__name__)
 
+ALEMBIC_CONFIG = Path(__file__).parents[1] / "alembic.ini"
+
 
 def startup(db: Session) -> None:
     """
     Run initialisation steps for the application:
-    sync calendars, init achievements, seed user.
+    init achievements, seed user.
+
+    NOTE: External calendars are synced by the background
+    worker in `services/calendar_sync.py` instead.
     """
     log.info("Running startup tasks...")
+    check_schema_revision(db)
     log.warning("Not implemented yet.")
+
+
+def check_schema_revision(db: Session) -> None:
+    """
+    Warn if the DB isn't migrated to the latest revision (without touching the schema).
+
+    Costs a single query on `alembic_version`, unlike reflecting every table.
+    """
+    current = MigrationContext.configure(db.connection()).get_current_revision()
+    head = ScriptDirectory.from_config(Config(ALEMBIC_CONFIG)).get_current_head()
+    if current != head:
+        log.warning(
+            "DB schema is at revision %s, but the latest is %s. "
+            "Run `alembic -c backend/alembic.ini upgrade head`.",
+            current,
+            head,
+        )
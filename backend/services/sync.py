@@ -0,0 +1,89 @@
+from typing import NamedTuple
+
+from sqlalchemy import BigInteger, Select, Text, cast, func, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import Event, Plannable, Recurrence, Tag, Task, Tombstone
+from backend.services.events import EVENT_COLUMNS, EventRow
+from backend.services.tasks import TASK_COLUMNS, TaskRow
+
+_plannable_table = Plannable.__table__
+_task_table = Task.__table__
+_event_table = Event.__table__
+
+
+class TagRow(NamedTuple):
+    id: int
+    name: str
+
+
+class SyncDelta(NamedTuple):
+    """
+    What changed in a user's calendar since a sync token, and the token to sync from next.
+    """
+
+    token: int
+    tasks: list[TaskRow]
+    # Events as stored, i.e. recurring ones aren't expanded (see `recurrence_id`).
+    events: list[EventRow]
+    tags: list[TagRow]
+    deleted_plannables: list[int]
+    deleted_tags: list[int]
+
+
+async def get_changes(db: AsyncSession, username: str, since: int | None = None) -> SyncDelta:
+    """
+    Return the user's tasks, events and tags changed since `since` (a token returned by a
+    previous call), and the IDs of those deleted meanwhile. Without `since`, return
+    everything (and no deletions).
+
+    Tokens are transaction IDs: the next token is the oldest transaction still
+    running when this one started, so a change committed concurrently is
+    never skipped (it may be sent twice instead, i.e. clients must upsert).
+    """
+    # Taken before reading anything, so that every older transaction is visible below.
+    snapshot_xmin = cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger)
+    token: int = (await db.execute(select(snapshot_xmin))).scalar_one()
+
+    tasks = select(*TASK_COLUMNS).where(Task.username == username)
+    events = (
+        select(*EVENT_COLUMNS, Recurrence.id)
+        .outerjoin(Recurrence, Recurrence.plannable_id == Event.id)
+        .where(Event.username == username)
+    )
+    tags = select(Tag.id, Tag.name).where(Tag.username == username)
+    deleted: list[tuple[str, int]] = []
+
+    if since is not None:
+        changed = _changed_plannables(username, since)
+        tasks = tasks.where(Task.id.in_(changed))
+        events = events.where(Event.id.in_(changed))
+        tags = tags.where(Tag.change_xid >= since)
+        result = await db.execute(
+            select(Tombstone.table_name, Tombstone.row_id).where(
+                Tombstone.username == username, Tombstone.change_xid >= since
+            )
+        )
+        deleted = list(result.tuples())
+
+    return SyncDelta(
+        token=token,
+        tasks=[TaskRow(*row) for row in await db.execute(tasks.order_by(Task.id))],
+        events=[EventRow(*row) for row in await db.execute(events.order_by(Event.id))],
+        tags=[TagRow(*row) for row in await db.execute(tags.order_by(Tag.id))],
+        deleted_plannables=[row_id for table, row_id in deleted if table == "plannable"],
+        deleted_tags=[row_id for table, row_id in deleted if table == "tag"],
+    )
+
+
+def _changed_plannables(username: str, since: int) -> Select:
+    """IDs of the user's plannables whose own, task or event row changed since the token."""
+    # Each table is read on its own, so that each uses its (username, change_xid) index.
+    return select(
+        union(
+            *(
+                select(table.c.id).where(table.c.username == username, table.c.change_xid >= since)
+                for table in (_plannable_table, _task_table, _event_table)
+            )
+        ).subquery()
+    )
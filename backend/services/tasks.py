@@ -1,48 +1,163 @@
-from typing import Any, Dict
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import NamedTuple
 
-from sqlalchemy import desc
+from sqlalchemy import Select, desc, insert, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from backend.database import Task
-from backend.tools.jsonify import convertToJson
+from backend.database import Event, Task
+from backend.misc.defaults import DefaultPagination
+from backend.misc.loading import PlannableRelation
+from backend.schemas.tasks import TaskCreate, TaskCreateForm, TaskUpdateForm
+from backend.services.events import delete_events_from_task
+from backend.services.loading import plannable_loader_options
+from backend.services.scheduler import ScheduleDiff, reschedule_task, schedule_task, schedule_tasks
+from backend.services.time import load_user_timezone, to_naive_utc
+from backend.tools.cursors import Cursor
+
+
+class TaskRow(NamedTuple):
+    """
+    Read-only view of a task (fields of `TaskResponse`), selected without the ORM.
+    """
+
+    id: int
+    username: str
+    title: str
+    description: str
+    priority: int
+    is_completed: bool | None
+    deadline: datetime
+    duration: timedelta
+
+
+TASK_COLUMNS = tuple(getattr(Task, field) for field in TaskRow._fields)
+
+
+async def create_task(db: AsyncSession, form: TaskCreateForm) -> tuple[Task, list[Event]]:
+    """Save a new task and schedule it into the user's free time."""
+    task = Task(
+        username=form.username,
+        title=form.title,
+        description=form.description,
+        priority=form.priority,
+        is_completed=False,
+        deadline=to_naive_utc(form.deadline),
+        duration=timedelta(minutes=form.duration),
+    )
+    db.add(task)
+    await db.flush()
+
+    zone = await load_user_timezone(db, form.username)
+    events = await schedule_task(db, task, zone)
+
+    return task, events
+
+
+async def create_tasks(
+    db: AsyncSession,
+    username: str,
+    tasks: list[TaskCreate],
+) -> list[tuple[Task, list[Event]]]:
+    """
+    Save many tasks of a user in one statement (per table), then schedule them all
+    in a single pass (see `schedule_tasks`). Returned in the given order.
+    """
+    if not tasks:
+        return []
+
+    created = list(
+        await db.scalars(
+            insert(Task).returning(Task, sort_by_parameter_order=True),
+            [
+                {
+                    "username": username,
+                    "title": task.title,
+                    "description": task.description,
+                    "priority": task.priority,
+                    "is_completed": False,
+                    "deadline": to_naive_utc(task.deadline),
+                    "duration": timedelta(minutes=task.duration),
+                }
+                for task in tasks
+            ],
+        )
+    )
 
+    zone = await load_user_timezone(db, username)
+    events = await schedule_tasks(db, created, zone)
 
-def get_user_tasks(username: str, db: Session) -> None:
-    """Return all tasks for a user as JSON, or an empty list if none exist."""
-    raise NotImplementedError
+    return [(task, events[task.id]) for task in created]
 
-    tasks = db.query(Task).filter(Task.username == username).all()
 
-    return {"tasks": [convertToJson(task) for task in tasks]} if tasks else {"tasks": []}
+async def get_user_tasks(
+    db: AsyncSession,
+    username: str,
+    after: Cursor | None = None,
+    limit: int = DefaultPagination.page_size,
+) -> list[TaskRow]:
+    """
+    Return a page of the user's tasks, ordered by (deadline, id).
 
+    Pages are keyset-based: pass the (deadline, id) of the last task of a
+    page as `after` to get the next one. Served by the
+    `(username, deadline, id)` index, so late pages are as cheap as the first.
+    """
+    result = await db.execute(_user_tasks_page(select(*TASK_COLUMNS), username, after, limit))
+    return [TaskRow(*row) for row in result]
 
-def get_latest_user_task(username: str, db: Session) -> None:
-    """Return the most recent task for a user, or None if none exist."""
-    raise NotImplementedError
 
-    latest_task = (
-        db.query(Task).filter(Task.username == username).order_by(desc(Task.taskID)).first()
+async def get_latest_user_task(db: AsyncSession, username: str) -> TaskRow | None:
+    """Return the user's most recently created task, or None."""
+    result = await db.execute(
+        select(*TASK_COLUMNS).where(Task.username == username).order_by(desc(Task.id)).limit(1)
     )
+    row = result.first()
+    return TaskRow(*row) if row is not None else None
 
-    return {"latest_task": convertToJson(latest_task)} if latest_task else {"latest_task": None}
 
+async def get_user_task_details(
+    db: AsyncSession,
+    username: str,
+    include: Iterable[PlannableRelation],
+    after: Cursor | None = None,
+    limit: int = DefaultPagination.page_size,
+) -> list[Task]:
+    """Same as `get_user_tasks`, but with the given relationships of the tasks loaded."""
+    query = select(Task).options(*plannable_loader_options(Task, include))
+    result = await db.scalars(_user_tasks_page(query, username, after, limit))
+    return list(result)
 
-def edit_task(taskID: int, task_properties: Dict[str, Any], db: Session) -> None:
-    """Update a task’s attributes if valid and types match; reject otherwise."""
-    raise NotImplementedError
 
-    task = db.query(Task).filter(Task.taskID == taskID).first()
-    for attribute, value in task_properties.items():
-        if not hasattr(task, attribute) or attribute == "taskID":
-            return {"success": False}
-        if type(getattr(task, attribute)) != type(value):
-            return {"success": False}
-        setattr(task, attribute, value)
+def _user_tasks_page(query: Select, username: str, after: Cursor | None, limit: int) -> Select:
+    query = query.where(Task.username == username)
+    if after is not None:
+        query = query.where(tuple_(Task.deadline, Task.id) > tuple_(*map(literal, after)))
+    return query.order_by(Task.deadline, Task.id).limit(limit)
 
-    db.merge(task)
-    db.commit()
 
-    return {"success": True}
+async def update_task(
+    db: AsyncSession,
+    task_id: int,
+    form: TaskUpdateForm,
+) -> tuple[Task, ScheduleDiff] | None:
+    """Update a task and incrementally reschedule the events affected by the change."""
+    task = await db.get(Task, task_id)
+    if task is None:
+        return None
+
+    previous_deadline = task.deadline
+    task.title = form.title
+    task.description = form.description
+    task.priority = form.priority
+    task.deadline = to_naive_utc(form.deadline)
+    task.duration = timedelta(minutes=form.duration)
+
+    zone = await load_user_timezone(db, task.username)
+    diff = await reschedule_task(db, task, previous_deadline, zone)
+
+    return task, diff
 
 
 def set_task_complete(task_id: int, db: Session) -> None:
@@ -75,14 +190,19 @@ def set_task_incomplete(task_id: int, db: Session) -> None:
     return {"task_changed": True}
 
 
-def delete_task(task_id: int, db: Session) -> None:
-    """Delete a task if it exists, otherwise return false."""
-    raise NotImplementedError
+async def delete_task(db: AsyncSession, task_id: int) -> ScheduleDiff | None:
+    """
+    Delete a task and its events, or return None if it doesn't exist.
+
+    Freed time is simply left free, so no other events have to move.
+    """
+    task = await db.get(Task, task_id)
+    if task is None:
+        return None
 
-    task = db.query(Task).filter(Task.taskID == task_id).first()
-    if task:
-        db.delete(task)
-        db.commit()
-        return {"task_deleted": True}
+    # One statement instead of loading `task.events`.
+    diff = ScheduleDiff(deleted=await delete_events_from_task(db, task_id))
+    await db.delete(task)
+    await db.flush()
 
-    return {"task_deleted": False}
+    return diff
@@ -1,8 +1,12 @@
 import zoneinfo
-from datetime import datetime
+from collections.abc import Iterable
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.database import User
 from backend.misc.defaults import DefaultUserSettings
+from backend.services.user_settings import get_users_settings
 from backend.tools.time_defaults import get_valid_or_default_timezone
 
 
@@ -17,6 +21,49 @@ def get_user_timezone(user: User) -> zoneinfo.ZoneInfo:
     return get_valid_or_default_timezone(timezone_name)
 
 
+async def load_user_timezone(db: AsyncSession, username: str) -> zoneinfo.ZoneInfo:
+    """Return the timezone of the user with the given username, or the default one."""
+    return (await load_user_timezones(db, [username]))[username]
+
+
+async def load_user_timezones(
+    db: AsyncSession,
+    usernames: Iterable[str],
+) -> dict[str, zoneinfo.ZoneInfo]:
+    """
+    Return the timezones of many users at once, or the default one for each unset.
+
+    Read through the cache of user settings (see services/user_settings.py),
+    so cached users cost nothing, and the rest are resolved with a single query.
+    """
+    usernames = list(usernames)
+    settings = await get_users_settings(db, usernames)
+    return {
+        username: get_valid_or_default_timezone(
+            settings[username].timezone if username in settings else DefaultUserSettings.timezone
+        )
+        for username in usernames
+    }
+
+
 def get_current_user_time(user: User) -> datetime:
     """Return the current datetime localized to the user's timezone."""
     return datetime.now(get_user_timezone(user))
+
+
+def to_naive_utc(moment: datetime) -> datetime:
+    """
+    Convert a datetime to the naive UTC form stored in `event`/`task` columns.
+
+    Naive datetimes are assumed to already be in UTC and are returned as is.
+    """
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def to_aware_utc(moment: datetime) -> datetime:
+    """Interpret naive datetimes as UTC, leave timezone-aware ones unchanged."""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
@@ -0,0 +1,338 @@
+import asyncio
+from collections.abc import Callable, Collection, Iterable, Sequence
+from typing import Any, NamedTuple
+
+import orjson
+from sqlalchemy import ARRAY, Text
+from sqlalchemy import event as sa_event
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapper, Session, object_session
+
+from backend.database import User, UserModelParameters, UserSettings
+from backend.misc.config import USER_CACHE_SIZE, USER_CACHE_TTL, USER_CACHE_URL
+from backend.misc.defaults import DefaultModelParameters, DefaultUserSettings
+from backend.misc.logger import get_logger
+from backend.misc.user_settings import Theme
+from backend.tools.cache import create_cache
+
+log = get_logger(__name__)
+
+# Key of `Session.info` that collects users whose cached entries changed in the transaction.
+_STALE_USERS_KEY = "stale_user_cache"
+
+# Read-through cache in front of `user_settings` and `user_model_parameters`.
+user_cache = create_cache(USER_CACHE_URL, USER_CACHE_SIZE)
+# Invalidations still running after a commit (kept so they aren't garbage collected).
+_invalidations: set[asyncio.Task] = set()
+
+# Layout version -> function turning a parameter document of that version into the next one.
+_MODEL_PARAMETERS_UPGRADES: dict[int, Callable[[dict[str, Any]], dict[str, Any]]] = {}
+
+
+class UserSettingsValues(NamedTuple):
+    """
+    A user's settings, with the defaults filled in for whatever they didn't change.
+    """
+
+    timezone: str
+    theme: Theme
+
+
+async def get_user_settings(db: AsyncSession, username: str) -> UserSettingsValues | None:
+    """Return the user's settings (cached), or None if the user doesn't exist."""
+    return (await get_users_settings(db, [username])).get(username)
+
+
+async def get_users_settings(
+    db: AsyncSession,
+    usernames: Iterable[str],
+) -> dict[str, UserSettingsValues]:
+    """
+    Return the settings of many users at once (cached), leaving out the ones that don't exist.
+
+    Cached users cost nothing, the rest are read with a single query.
+    """
+    usernames = list(dict.fromkeys(usernames))
+    cached = await asyncio.gather(*(user_cache.get(_settings_key(name)) for name in usernames))
+
+    settings: dict[str, UserSettingsValues] = {}
+    missing: list[str] = []
+    for username, value in zip(usernames, cached):
+        if value is None:
+            missing.append(username)
+        else:
+            values = orjson.loads(value)
+            settings[username] = UserSettingsValues(values["timezone"], Theme(values["theme"]))
+
+    if missing:
+        result = await db.execute(
+            select(User.username, UserSettings.timezone, UserSettings.theme)
+            .outerjoin(UserSettings)
+            .where(User.username.in_(missing))
+        )
+        loaded = {
+            row.username: UserSettingsValues(
+                timezone=row.timezone or DefaultUserSettings.timezone,
+                theme=Theme(row.theme or DefaultUserSettings.theme),
+            )
+            for row in result
+        }
+        await asyncio.gather(
+            *(
+                user_cache.set(
+                    _settings_key(username), orjson.dumps(values._asdict()), USER_CACHE_TTL
+                )
+                for username, values in loaded.items()
+            )
+        )
+        settings.update(loaded)
+
+    return settings
+
+
+async def get_user_model_parameters(
+    db: AsyncSession,
+    username: str,
+    keys: Collection[str] | None = None,
+) -> dict[str, Any] | None:
+    """
+    Return the user's model parameters ({} if unset), or None if the user doesn't exist.
+
+    With `keys`, only those (top-level) keys are returned, and unless the whole
+    document is cached, only their values are read from the DB.
+    """
+    cached = await user_cache.get(_parameters_key(username))
+    if cached is not None:
+        return _pick(orjson.loads(cached), keys)
+
+    if keys is not None:
+        result = await db.execute(
+            select(
+                User.username,
+                UserModelParameters.schema_version,
+                *(UserModelParameters.parameters[key] for key in keys),
+            )
+            .outerjoin(UserModelParameters)
+            .where(User.username == username)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        version = row.schema_version or DefaultModelParameters.schema_version
+        # Keys may have moved in older documents, so those are upgraded as a whole.
+        if version == DefaultModelParameters.schema_version:
+            return {key: value for key, value in zip(keys, row[2:]) if value is not None}
+
+    result = await db.execute(
+        select(User.username, UserModelParameters.parameters, UserModelParameters.schema_version)
+        .outerjoin(UserModelParameters)
+        .where(User.username == username)
+    )
+    row = result.first()
+    if row is None:
+        return None
+
+    parameters = upgrade_model_parameters(row.parameters or {}, row.schema_version)
+    await user_cache.set(_parameters_key(username), orjson.dumps(parameters), USER_CACHE_TTL)
+    return _pick(parameters, keys)
+
+
+async def update_user_settings(
+    db: AsyncSession,
+    username: str,
+    timezone: str | None = None,
+    theme: Theme | None = None,
+) -> UserSettingsValues | None:
+    """
+    Change the given settings of a user (keeping the others), or return None if the user
+    doesn't exist.
+    """
+    settings = await db.get(UserSettings, username)
+    if settings is None:
+        if await db.get(User, username) is None:
+            return None
+        settings = UserSettings(username=username)
+        db.add(settings)
+
+    if timezone is not None:
+        settings.timezone = timezone
+    if theme is not None:
+        settings.theme = theme
+    await db.flush()
+    await invalidate_user_cache(username)
+
+    return UserSettingsValues(settings.timezone, Theme(settings.theme))
+
+
+async def reset_user_settings(db: AsyncSession, username: str) -> None:
+    """Go back to the default settings (by dropping the user's `user_settings` row)."""
+    settings = await db.get(UserSettings, username)
+    if settings is not None:
+        await db.delete(settings)
+        await db.flush()
+    await invalidate_user_cache(username)
+
+
+async def set_user_model_parameters(
+    db: AsyncSession,
+    username: str,
+    parameters: dict[str, Any],
+) -> dict[str, Any] | None:
+    """Replace the user's model parameters, or return None if the user doesn't exist."""
+    model_parameters = await db.get(UserModelParameters, username)
+    if model_parameters is None:
+        if await db.get(User, username) is None:
+            return None
+        model_parameters = UserModelParameters(username=username)
+        db.add(model_parameters)
+
+    model_parameters.parameters = parameters
+    model_parameters.schema_version = DefaultModelParameters.schema_version
+    await db.flush()
+    await invalidate_user_cache(username)
+
+    return parameters
+
+
+async def set_user_model_parameter(
+    db: AsyncSession,
+    username: str,
+    path: Sequence[str],
+    value: Any,
+) -> bool:
+    """
+    Set a single (possibly nested) model parameter in the DB, without reading or
+    rewriting the rest of the document. Return False if the user doesn't exist.
+
+    All but the last key of `path` must already exist (like `jsonb_set()`).
+    """
+    document: Any = value
+    for key in reversed(path):
+        document = {key: document}
+
+    user_exists = select(User.username).where(User.username == username).exists()
+    result = await db.execute(
+        pg_insert(UserModelParameters)
+        .from_select(
+            ["username", "parameters", "schema_version"],
+            select(
+                literal(username),
+                literal(document, JSONB),
+                literal(DefaultModelParameters.schema_version),
+            ).where(user_exists),
+        )
+        .on_conflict_do_update(
+            index_elements=[UserModelParameters.username],
+            set_={
+                "parameters": func.jsonb_set(
+                    UserModelParameters.parameters,
+                    literal(list(path), ARRAY(Text)),
+                    literal(value, JSONB),
+                ),
+                "updated_at": func.now(),
+            },
+        )
+        .returning(UserModelParameters.username)
+    )
+    if result.first() is None:
+        return False
+
+    await _invalidate_in_transaction(db, username)
+    return True
+
+
+async def delete_user_model_parameter(db: AsyncSession, username: str, path: Sequence[str]) -> None:
+    """Remove a single (possibly nested) model parameter, in the DB."""
+    await db.execute(
+        update(UserModelParameters)
+        .where(UserModelParameters.username == username)
+        .values(
+            parameters=UserModelParameters.parameters.op("#-")(literal(list(path), ARRAY(Text)))
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await _invalidate_in_transaction(db, username)
+
+
+def upgrade_model_parameters(parameters: dict[str, Any], version: int | None) -> dict[str, Any]:
+    """Bring a parameter document of an older layout version up to the current one."""
+    version = version or DefaultModelParameters.schema_version
+    while version < DefaultModelParameters.schema_version:
+        parameters = _MODEL_PARAMETERS_UPGRADES[version](parameters)
+        version += 1
+    return parameters
+
+
+async def invalidate_user_cache(*usernames: str) -> None:
+    """
+    Drop the cached settings and model parameters of the users.
+
+    ORM writes to either table are invalidated automatically (see the
+    listeners below), bulk statements must call this themselves.
+    """
+    await user_cache.delete(*(key for username in usernames for key in _keys(username)))
+
+
+async def _invalidate_in_transaction(db: AsyncSession, username: str) -> None:
+    # Core statements don't trigger the mapper listeners, so record the user by hand.
+    db.info.setdefault(_STALE_USERS_KEY, set()).add(username)
+    await invalidate_user_cache(username)
+
+
+def _pick(parameters: dict[str, Any], keys: Collection[str] | None) -> dict[str, Any]:
+    if keys is None:
+        return parameters
+    return {key: parameters[key] for key in keys if key in parameters}
+
+
+def _settings_key(username: str) -> str:
+    return f"user_settings:{username}"
+
+
+def _parameters_key(username: str) -> str:
+    return f"user_model_parameters:{username}"
+
+
+def _keys(username: str) -> tuple[str, str]:
+    return _settings_key(username), _parameters_key(username)
+
+
+@sa_event.listens_for(UserSettings, "after_insert")
+@sa_event.listens_for(UserSettings, "after_update")
+@sa_event.listens_for(UserSettings, "after_delete")
+@sa_event.listens_for(UserModelParameters, "after_insert")
+@sa_event.listens_for(UserModelParameters, "after_update")
+@sa_event.listens_for(UserModelParameters, "after_delete")
+def _record_stale_user(_: Mapper, __: object, target: UserSettings | UserModelParameters) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_STALE_USERS_KEY, set()).add(target.username)
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    # Invalidate again on commit, so that a concurrent request can't keep
+    # the old values cached after re-reading them before the change was visible.
+    usernames = session.info.pop(_STALE_USERS_KEY, ())
+    if not usernames:
+        return
+
+    log.debug("Invalidating cached settings of users %s.", usernames)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Sync sessions (e.g., scripts) commit outside of any event loop.
+        asyncio.run(invalidate_user_cache(*usernames))
+        return
+
+    task = loop.create_task(invalidate_user_cache(*usernames))
+    _invalidations.add(task)
+    task.add_done_callback(_invalidations.discard)
+
+
+@sa_event.listens_for(Session, "after_soft_rollback")
+def _forget_stale_users(session: Session, _: object) -> None:
+    session.info.pop(_STALE_USERS_KEY, None)
@@ -0,0 +1,62 @@
+import os
+
+# The app's engines connect to POSTGRES_DB when imported, so point them to a
+# throwaway database first. The other POSTGRES_* variables are used as is.
+os.environ["POSTGRES_DB"] = os.getenv("TEST_POSTGRES_DB", "test")
+
+from collections.abc import AsyncIterator, Iterator  # noqa: E402
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from backend.database import ORMBase  # noqa: E402
+from backend.database.constants import DATABASE_URL  # noqa: E402
+from backend.database.db_session import async_engine, engine  # noqa: E402
+from backend.main import run_app  # noqa: E402
+from backend.services.recurrence import occurrence_cache  # noqa: E402
+from backend.services.user_settings import user_cache  # noqa: E402
+from backend.tools.cache import MemoryCache  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def database() -> Iterator[None]:
+    """Create the test database with the current schema, and drop it afterwards."""
+    url = make_url(DATABASE_URL)
+    server = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    try:
+        with server.connect() as connection:
+            connection.execute(text(f'DROP DATABASE IF EXISTS "{url.database}"'))
+            connection.execute(text(f'CREATE DATABASE "{url.database}"'))
+    except OperationalError as error:
+        server.dispose()
+        pytest.skip(f"PostgreSQL isn't available: {error}")
+
+    # Like the migrations, incl. the triggers (see the models' DDL listeners).
+    ORMBase.metadata.create_all(engine)
+    try:
+        yield
+    finally:
+        engine.dispose()
+        with server.connect() as connection:
+            connection.execute(text(f'DROP DATABASE IF EXISTS "{url.database}"'))
+        server.dispose()
+
+
+@pytest.fixture(scope="session")
+async def client(database: None) -> AsyncIterator[httpx.AsyncClient]:
+    """HTTP client of the app (without its lifespan, so no background workers)."""
+    transport = httpx.ASGITransport(app=run_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    await async_engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def cold_caches() -> None:
+    """Start every test with empty in-process caches, so that it doesn't depend on others."""
+    occurrence_cache.clear()
+    if isinstance(user_cache, MemoryCache):
+        user_cache.clear()
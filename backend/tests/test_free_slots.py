@@ -0,0 +1,156 @@
+"""
+`FreeSlots` must place tasks (and reserve/release time) exactly like a plain scan
+of the sorted slots would, which `LinearFreeSlots` below does.
+"""
+
+import random
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.tools.free_slots import FreeSlots, Interval
+
+
+class LinearFreeSlots:
+    """The previous list-based implementation: same results, found by scanning the slots."""
+
+    def __init__(self, slots: Iterable[Interval] = ()) -> None:
+        self._starts: list[datetime] = []
+        self._ends: list[datetime] = []
+        for start, end in sorted(slots):
+            self.release(start, end)
+
+    @classmethod
+    def between(cls, allowed: Iterable[Interval], busy: Iterable[Interval]) -> "LinearFreeSlots":
+        """Build the free slots of `allowed` time that isn't covered by `busy` time."""
+        free = cls(allowed)
+        for start, end in busy:
+            free.reserve(start, end)
+        return free
+
+    def __iter__(self) -> Iterator[Interval]:
+        return zip(self._starts, self._ends)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def total(self) -> timedelta:
+        """Return the total free time."""
+        return sum((end - start for start, end in self), timedelta())
+
+    def index_at(self, moment: datetime) -> int:
+        """Return the index of the first slot that ends after `moment`."""
+        return bisect_right(self._ends, moment)
+
+    def reserve(self, start: datetime, end: datetime) -> None:
+        """Mark [start, end) as busy, splitting/trimming the slots it overlaps."""
+        if start >= end:
+            return
+
+        first = bisect_right(self._ends, start)
+        last = bisect_left(self._starts, end)
+        if first >= last:
+            return  # Already busy.
+
+        # Keep the parts of the first/last overlapped slots that stick out.
+        remainder: list[Interval] = []
+        if self._starts[first] < start:
+            remainder.append((self._starts[first], start))
+        if self._ends[last - 1] > end:
+            remainder.append((end, self._ends[last - 1]))
+
+        self._starts[first:last] = [slot[0] for slot in remainder]
+        self._ends[first:last] = [slot[1] for slot in remainder]
+
+    def release(self, start: datetime, end: datetime) -> None:
+        """Mark [start, end) as free, merging it with any touching slots."""
+        if start >= end:
+            return
+
+        first = bisect_left(self._ends, start)
+        last = bisect_right(self._starts, end)
+        if first < last:
+            start = min(start, self._starts[first])
+            end = max(end, self._ends[last - 1])
+
+        self._starts[first:last] = [start]
+        self._ends[first:last] = [end]
+
+    def place(
+        self,
+        duration: timedelta,
+        not_before: datetime,
+        deadline: datetime,
+        min_chunk: timedelta,
+        max_chunk: timedelta | None = None,
+    ) -> list[Interval]:
+        """
+        Reserve up to `duration` of free time within [not_before, deadline), earliest first.
+
+        At most one chunk of `max_chunk` is taken from each slot, and chunks
+        shorter than `min_chunk` are only used for the very last bit of the
+        duration. Returns the reserved chunks, which may add up to less than
+        `duration` if there isn't enough free time.
+        """
+        chunks: list[Interval] = []
+        remaining = duration
+        index = self.index_at(not_before)
+
+        while remaining > timedelta() and index < len(self._starts):
+            start = max(self._starts[index], not_before)
+            if start >= deadline:
+                break
+
+            available = min(self._ends[index], deadline) - start
+            if available >= min(min_chunk, remaining):
+                length = min(available, remaining)
+                if max_chunk is not None:
+                    length = min(length, max_chunk)
+                chunks.append((start, start + length))
+                remaining -= length
+            index += 1
+
+        for start, end in chunks:
+            self.reserve(start, end)
+
+        return chunks
+
+
+ORIGIN = datetime(2030, 1, 1)
+
+
+def _interval(rng: random.Random) -> Interval:
+    start = ORIGIN + timedelta(minutes=15 * rng.randrange(0, 2000))
+    return start, start + timedelta(minutes=15 * rng.randrange(1, 40))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_matches_linear_scan(seed: int) -> None:
+    rng = random.Random(seed)
+    allowed = [_interval(rng) for _ in range(rng.randrange(0, 60))]
+    busy = [_interval(rng) for _ in range(rng.randrange(0, 60))]
+    free, reference = FreeSlots.between(allowed, busy), LinearFreeSlots.between(allowed, busy)
+    assert list(free) == list(reference)
+
+    for _ in range(200):
+        operation = rng.choice(("reserve", "release", "place"))
+        if operation == "place":
+            not_before, deadline = sorted(_interval(rng))
+            deadline += timedelta(days=rng.randrange(0, 20))
+            arguments = (
+                timedelta(minutes=15 * rng.randrange(1, 100)),
+                not_before,
+                deadline,
+                timedelta(minutes=15 * rng.randrange(0, 8)),
+                rng.choice((None, timedelta(minutes=15 * rng.randrange(1, 16)))),
+            )
+            assert free.place(*arguments) == reference.place(*arguments)
+        else:
+            start, end = _interval(rng)
+            getattr(free, operation)(start, end)
+            getattr(reference, operation)(start, end)
+        assert list(free) == list(reference)
+        assert len(free) == len(reference)
+        assert free.total() == reference.total()
@@ -0,0 +1,126 @@
+"""
+Every listing must cost a fixed number of queries, however many rows it returns
+(i.e., no N+1 lazy loads). Each endpoint is requested for a user with a few rows
+and for one with many, and both must execute the same (bounded) number of statements.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from backend.database import Event, Recurrence, Tag, Task, User
+from backend.database.db_session import AsyncSessionLocal, async_engine
+from backend.misc.recurrence import RecurrenceFrequency
+from backend.tools.query_counter import count_queries
+
+SMALL, LARGE = 2, 40
+# Every row is within [WINDOW_START, WINDOW_END).
+WINDOW_START, WINDOW_END = datetime(2030, 1, 1), datetime(2030, 2, 1)
+WINDOW = f"start={WINDOW_START.isoformat()}&end={WINDOW_END.isoformat()}"
+DAYS = f"start={WINDOW_START.date()}&end={WINDOW_END.date()}"
+
+
+@pytest.fixture(scope="session")
+async def users(database: None) -> dict[int, int]:
+    """Create a user per size ("user2", "user40"), return {size: ID of their busiest task}."""
+    busiest_tasks = {}
+    async with AsyncSessionLocal() as db, db.begin():
+        for size in (SMALL, LARGE):
+            username = f"user{size}"
+            db.add(User(username=username))
+            tags = [Tag(username=username, name=f"tag{index}") for index in range(size)]
+            start = WINDOW_START + timedelta(days=1, hours=9)
+
+            tasks = []
+            for index in range(size):
+                # The first task has an event per row, the others a single one.
+                events = [
+                    Event(
+                        username=username,
+                        title=f"Work {index}.{part}",
+                        description="",
+                        priority=1,
+                        is_completed=False,
+                        start=start + timedelta(hours=index, minutes=part),
+                        end=start + timedelta(hours=index, minutes=part + 1),
+                    )
+                    for part in range(size if index == 0 else 1)
+                ]
+                tasks.append(
+                    Task(
+                        username=username,
+                        title=f"Task {index}",
+                        description="",
+                        priority=index % 3,
+                        is_completed=False,
+                        deadline=WINDOW_END - timedelta(days=1),
+                        duration=timedelta(hours=1),
+                        tags=[tags[index], tags[(index + 1) % size]],
+                        events=events,
+                    )
+                )
+
+            # Standalone events, every other one a daily series.
+            for index in range(size):
+                recurrence = None
+                if index % 2:
+                    recurrence = Recurrence(
+                        start=(start + timedelta(hours=index)).replace(tzinfo=timezone.utc),
+                        frequency=RecurrenceFrequency.DAILY,
+                        interval=1,
+                    )
+                db.add(
+                    Event(
+                        username=username,
+                        title=f"Meeting {index}",
+                        description="",
+                        priority=0,
+                        is_completed=True,
+                        start=start + timedelta(hours=index),
+                        end=start + timedelta(hours=index, minutes=30),
+                        tags=[tags[index]],
+                        recurrence=recurrence,
+                    )
+                )
+
+            db.add_all(tasks)
+            await db.flush()
+            busiest_tasks[size] = tasks[0].id
+
+    return busiest_tasks
+
+
+# Path (with {username}/{task_id} placeholders) -> max number of queries.
+LISTINGS = {
+    "/tasks/user/{username}": 1,
+    "/tasks/user/{username}?include=tags&include=events&include=recurrence": 4,
+    "/tasks/user/{username}/latest": 1,
+    "/events/list_from_task/{task_id}": 1,
+    "/events/list_all_from_user/{username}": 1,
+    "/events/list_all_from_user/{username}?include=tags&include=recurrence": 3,
+    f"/events/list_from_user/{{username}}?{WINDOW}": 3,
+    "/plannables/search/{username}?any_tags=tag0&any_tags=tag1&text=0": 1,
+    "/sync/{username}": 4,
+    f"/users/{{username}}/freebusy?{WINDOW}": 3,
+    f"/users/{{username}}/daily_load?{DAYS}": 3,
+    f"/users/freebusy/common?usernames={{username}}&{WINDOW}": 3,
+}
+
+
+@pytest.mark.parametrize("path, max_queries", LISTINGS.items(), ids=list(LISTINGS))
+async def test_listing_queries_dont_grow_with_rows(
+    client: httpx.AsyncClient,
+    users: dict[int, int],
+    path: str,
+    max_queries: int,
+) -> None:
+    counts = {}
+    for size, task_id in users.items():
+        with count_queries(async_engine) as queries:
+            response = await client.get(path.format(username=f"user{size}", task_id=task_id))
+        assert response.status_code == 200, response.text
+        queries.assert_at_most(max_queries)
+        counts[size] = queries.count
+
+    assert counts[SMALL] == counts[LARGE]
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+
+class CacheBackend(Protocol):
+    """
+    Byte-string key/value store with per-entry expiry, e.g., `MemoryCache` or `RedisCache`.
+    """
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+
+class MemoryCache:
+    """
+    Thread-safe, in-process LRU cache whose entries expire `ttl` seconds after being set.
+
+    Each worker process has its own, so entries can be stale for up to their
+    TTL after another process changed the underlying data.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        # Key -> (value, monotonic time at which it expires).
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache:
+    """
+    Cache shared by all processes, stored in Redis (or anything speaking its protocol).
+
+    `client` only needs the `get`, `set(..., px=)` and `delete` coroutines of
+    `redis.asyncio.Redis`, so a stub can stand in for it locally.
+    """
+
+    def __init__(self, client: Any, prefix: str = "schedemy:") -> None:
+        self._client = client
+        self._prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "schedemy:") -> "RedisCache":
+        # Optional dependency, only needed when a Redis URL is configured.
+        try:
+            from redis import asyncio as redis
+        except ImportError as error:
+            raise RuntimeError(f"Install the `redis` package to use a cache at {url}.") from error
+        return cls(redis.from_url(url), prefix)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._client.get(self._prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._client.set(self._prefix + key, value, px=int(ttl * 1000))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._client.delete(*(self._prefix + key for key in keys))
+
+
+def create_cache(url: str, max_size: int) -> CacheBackend:
+    """Return a Redis cache for `redis://`/`rediss://` URLs, otherwise an in-process one."""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache.from_url(url)
+    return MemoryCache(max_size)
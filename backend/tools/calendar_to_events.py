@@ -1,33 +1,291 @@
-import requests
-from ics import Calendar
+import hashlib
+import re
+import zoneinfo
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
 
+from backend.misc.logger import get_logger
 
-def get_events_from_external_cal_link(link: str) -> None:
-    raise NotImplementedError
-    """Fetch events from an external ICS calendar link and return them as lists of attributes."""
-    eventList = []
+log = get_logger(__name__)
 
-    try:
-        file = requests.get(link)
-    except Exception:
-        return {"Error": "Invalid link"}
+_DURATION_PATTERN = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+_TEXT_ESCAPES = {"n": "\n", "N": "\n", "\\": "\\", ",": ",", ";": ";"}
+
+
+@dataclass(frozen=True)
+class ParsedEvent:
+    """
+    A VEVENT reduced to the fields stored in the database (times are naive UTC).
+    """
+
+    # Unique within the calendar (overridden occurrences get the RECURRENCE-ID appended).
+    uid: str
+    title: str
+    description: str
+    start: datetime
+    end: datetime
+    # Parts of the RRULE (e.g., {"FREQ": "WEEKLY", "INTERVAL": "2"}), if any.
+    rrule: dict[str, str] | None = None
+    # Sorted starts of the series' occurrences that don't happen (EXDATE), or
+    # that are overridden by another VEVENT (see `original_start`).
+    excluded: tuple[datetime, ...] = ()
+    # For an overridden occurrence (RECURRENCE-ID): the UID of its series, and
+    # the start the occurrence had in that series.
+    series_uid: str | None = None
+    original_start: datetime | None = None
+    # For a series: the IANA zone of its DTSTART, whose wall-clock time it
+    # keeps (None: floating times and dates, which follow the user's zone).
+    timezone: str | None = None
+
+    def fingerprint(self) -> str:
+        """Return a hash of the event's content, which changes whenever the event does."""
+        rrule = sorted(self.rrule.items()) if self.rrule else None
+        content: tuple = (self.uid, self.title, self.description, self.start, self.end, rrule)
+        # Only hashed when set, so that the fingerprints of plain events stay the same.
+        if self.excluded or self.original_start is not None:
+            content += (self.excluded, self.original_start)
+        if self.timezone is not None:
+            content += (self.timezone,)
+        return hashlib.sha256(repr(content).encode()).hexdigest()
+
+
+class VEventParser:
+    """
+    Incremental iCalendar parser that only keeps the VEVENT being read in memory.
+
+    Feed it the raw bytes in chunks of any size (e.g., as they come from the
+    network), and it returns the events completed by each chunk.
+    """
+
+    def __init__(self, default_zone: zoneinfo.ZoneInfo) -> None:
+        # Times without a (known) TZID are interpreted in this zone.
+        self._default_zone = default_zone
+        self._partial_line = b""
+        self._logical_line: bytes | None = None
+        # Properties of the VEVENT being read, or None when outside of one.
+        self._properties: list[tuple[str, dict[str, str], str]] | None = None
+        # Depth of nested components (e.g., VALARM) within the VEVENT.
+        self._nested_depth = 0
+
+    def feed(self, chunk: bytes) -> list[ParsedEvent]:
+        """Consume a chunk of the feed and return the events it completed."""
+        lines = (self._partial_line + chunk).split(b"\n")
+        self._partial_line = lines.pop()
+
+        events: list[ParsedEvent] = []
+        for line in lines:
+            self._feed_line(line.rstrip(b"\r"), events)
+        return events
+
+    def close(self) -> list[ParsedEvent]:
+        """Flush the remaining input and return the events it completed."""
+        events: list[ParsedEvent] = []
+        if self._partial_line:
+            self._feed_line(self._partial_line.rstrip(b"\r"), events)
+            self._partial_line = b""
+        if self._logical_line is not None:
+            self._process_line(self._logical_line, events)
+            self._logical_line = None
+        return events
+
+    def _feed_line(self, line: bytes, events: list[ParsedEvent]) -> None:
+        # Long lines are folded into several, each continuation starting with
+        # a space or a tab. Folds may split multi-byte characters, hence bytes.
+        if line[:1] in (b" ", b"\t"):
+            if self._logical_line is not None:
+                self._logical_line += line[1:]
+            return
+
+        if self._logical_line is not None:
+            self._process_line(self._logical_line, events)
+        self._logical_line = line
+
+    def _process_line(self, raw_line: bytes, events: list[ParsedEvent]) -> None:
+        if not raw_line:
+            return
+
+        line = raw_line.decode("utf-8", errors="replace")
+        name, params, value = _split_content_line(line)
+
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and self._properties is None:
+                self._properties = []
+            elif self._properties is not None:
+                self._nested_depth += 1
+        elif name == "END":
+            if self._properties is None:
+                return
+            if self._nested_depth:
+                self._nested_depth -= 1
+            elif value.upper() == "VEVENT":
+                event = self._build_event(self._properties)
+                if event is not None:
+                    events.append(event)
+                self._properties = None
+        elif self._properties is not None and not self._nested_depth:
+            self._properties.append((name, params, value))
+
+    def _build_event(
+        self,
+        properties: list[tuple[str, dict[str, str], str]],
+    ) -> ParsedEvent | None:
+        fields = {name: (params, value) for name, params, value in properties}
+        if "DTSTART" not in fields:
+            log.debug("Skipping VEVENT without DTSTART.")
+            return None
+
+        try:
+            start, is_all_day = self._parse_time(fields["DTSTART"])
+            if "DTEND" in fields:
+                end, _ = self._parse_time(fields["DTEND"])
+            elif "DURATION" in fields:
+                end = start + _parse_duration(fields["DURATION"][1])
+            else:
+                end = start + (timedelta(days=1) if is_all_day else timedelta())
+            original_start: datetime | None = None
+            if "RECURRENCE-ID" in fields:
+                original_start, _ = self._parse_time(fields["RECURRENCE-ID"])
+        except ValueError:
+            log.debug("Skipping VEVENT with invalid times: %s", fields.get("UID"))
+            return None
 
-    if file.status_code != 200:
-        return {"Error": "Invalid link"}
+        if "UID" in fields:
+            uid = fields["UID"][1]
+        else:
+            # Stable across syncs, unless the event's title or start change.
+            raw_summary = fields["SUMMARY"][1] if "SUMMARY" in fields else ""
+            uid = hashlib.sha256(f"{raw_summary}\n{fields['DTSTART'][1]}".encode()).hexdigest()
 
-    file_type = file.headers.get("Content-Type", "")
-    if "text/calendar" not in file_type and "application/octet-stream" not in file_type:
-        return {"Error": "Invalid file type"}
+        series_uid = None
+        if original_start is not None:
+            # Overridden occurrence of a series, stored as a separate event (and
+            # excluded from the series, see services/external_calendars.py).
+            series_uid = uid
+            uid = f"{uid}@{fields['RECURRENCE-ID'][1]}"
 
+        rrule = None
+        if "RRULE" in fields:
+            rrule = dict(
+                part.split("=", 1) for part in fields["RRULE"][1].split(";") if "=" in part
+            )
+
+        return ParsedEvent(
+            uid=uid,
+            title=_unescape_text(fields["SUMMARY"][1]) if "SUMMARY" in fields else "",
+            description=(
+                _unescape_text(fields["DESCRIPTION"][1]) if "DESCRIPTION" in fields else ""
+            ),
+            start=start,
+            end=max(end, start),
+            rrule=rrule,
+            excluded=self._parse_excluded(properties) if rrule is not None else (),
+            series_uid=series_uid,
+            original_start=original_start,
+            timezone=_get_series_timezone(*fields["DTSTART"]) if rrule is not None else None,
+        )
+
+    def _parse_excluded(
+        self,
+        properties: list[tuple[str, dict[str, str], str]],
+    ) -> tuple[datetime, ...]:
+        # EXDATE can be repeated, and each one can list several times.
+        excluded: list[datetime] = []
+        for name, params, value in properties:
+            if name != "EXDATE":
+                continue
+            for part in value.split(","):
+                try:
+                    excluded.append(self._parse_time((params, part))[0])
+                except ValueError:
+                    log.debug("Ignoring invalid EXDATE: %s", part)
+        return tuple(sorted(excluded))
+
+    def _parse_time(self, field: tuple[dict[str, str], str]) -> tuple[datetime, bool]:
+        params, value = field
+        return parse_ical_time(value, params.get("TZID"), self._default_zone)
+
+
+def parse_ical_time(
+    value: str,
+    tzid: str | None,
+    default_zone: zoneinfo.ZoneInfo,
+) -> tuple[datetime, bool]:
+    """Parse a DATE or DATE-TIME value into naive UTC, also telling if it's a date."""
+    value = value.strip()
+    if "T" not in value:
+        day = date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+        moment = datetime.combine(day, datetime.min.time(), tzinfo=default_zone)
+        return moment.astimezone(timezone.utc).replace(tzinfo=None), True
+
+    moment = datetime.strptime(value.rstrip("Z")[:15], "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        return moment, False
+
+    return (
+        moment.replace(tzinfo=_get_zone(tzid, default_zone))
+        .astimezone(timezone.utc)
+        .replace(tzinfo=None),
+        False,
+    )
+
+
+def _get_zone(tzid: str | None, default_zone: zoneinfo.ZoneInfo) -> zoneinfo.ZoneInfo:
+    if tzid is None:
+        return default_zone
     try:
-        calendar = Calendar(file.text)
-    except Exception:
-        return {"Error": "Invalid ics format"}
+        return zoneinfo.ZoneInfo(tzid.strip('"'))
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        # E.g., Windows zone names used by Outlook.
+        return default_zone
+
+
+def _get_series_timezone(params: dict[str, str], value: str) -> str | None:
+    """Return the IANA zone of a DTSTART (UTC if it ends with Z), or None if it has none."""
+    value = value.strip()
+    if "T" not in value:
+        return None
+    if value.endswith("Z"):
+        return "UTC"
+    if "TZID" not in params:
+        return None
+    try:
+        return zoneinfo.ZoneInfo(params["TZID"].strip('"')).key
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def _split_content_line(line: str) -> tuple[str, dict[str, str], str]:
+    """Split `NAME;PARAM=x;PARAM="y:z":value` into its name, params and value."""
+    in_quotes = False
+    for index, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ":" and not in_quotes:
+            head, value = line[:index], line[index + 1 :]
+            break
+    else:
+        head, value = line, ""
+
+    name, *raw_params = head.split(";")
+    params = {}
+    for raw_param in raw_params:
+        key, _, param_value = raw_param.partition("=")
+        params[key.upper()] = param_value
+    return name.upper(), params, value
+
+
+def _parse_duration(value: str) -> timedelta:
+    match = _DURATION_PATTERN.match(value.strip())
+    if match is None:
+        raise ValueError(f"Invalid duration: {value}")
+
+    parts = {key: int(amount or 0) for key, amount in match.groupdict().items() if key != "sign"}
+    duration = timedelta(**parts)
+    return -duration if match.group("sign") == "-" else duration
 
-    for event in calendar.events:
-        start = event.begin.datetime
-        end = event.end.datetime
-        eventSingle = [event.name, start, end, event.description, link]
-        eventList.append(eventSingle)
 
-    return {"Valid link": eventList}
+def _unescape_text(value: str) -> str:
+    return re.sub(r"\\(.)", lambda match: _TEXT_ESCAPES.get(match[1], match[1]), value)
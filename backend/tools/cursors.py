@@ -0,0 +1,24 @@
+import base64
+from datetime import datetime
+
+import orjson
+
+# Position in a listing ordered by (time, id), e.g. (deadline, id) for tasks.
+Cursor = tuple[datetime, int]
+
+
+def encode_cursor(moment: datetime, id: int) -> str:
+    """Encode the position after a row into an opaque, URL-safe cursor."""
+    raw = orjson.dumps([moment.isoformat(), id])
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Decode a cursor made by `encode_cursor`, raise ValueError if it's malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        moment, id = orjson.loads(raw)
+        return datetime.fromisoformat(moment), int(id)
+    # binascii.Error is a ValueError.
+    except (ValueError, TypeError) as error:
+        raise ValueError(f"Invalid cursor: {cursor}") from error
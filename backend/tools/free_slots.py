@@ -0,0 +1,223 @@
+import random
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
+
+Interval = tuple[datetime, datetime]
+
+
+class _Slot:
+    """
+    Node of the treap behind `FreeSlots`: a free interval, ordered by start, and
+    the length of the longest slot in its subtree.
+    """
+
+    __slots__ = ("start", "end", "priority", "left", "right", "longest")
+
+    def __init__(self, start: datetime, end: datetime) -> None:
+        self.start = start
+        self.end = end
+        # Random heap priorities keep the tree balanced (expected depth O(log n)).
+        self.priority = random.random()
+        self.left: _Slot | None = None
+        self.right: _Slot | None = None
+        self.longest = end - start
+
+
+class FreeSlots:
+    """
+    Sorted, non-overlapping [start, end) free intervals.
+
+    Slots are kept in a treap (a randomly balanced search tree) ordered by
+    start, whose nodes also know the longest slot below them. Finding the slot
+    at a given time, or the first one after it that is long enough, is a single
+    descent, and so are reserving/releasing time (split, then merge the tree).
+    All of these are O(log n), so placing a task costs O(log n) per chunk,
+    however many slots are too short for it.
+    """
+
+    def __init__(self, slots: Iterable[Interval] = ()) -> None:
+        self._root: _Slot | None = None
+        for start, end in sorted(slots):
+            self.release(start, end)
+
+    @classmethod
+    def between(cls, allowed: Iterable[Interval], busy: Iterable[Interval]) -> "FreeSlots":
+        """Build the free slots of `allowed` time that isn't covered by `busy` time."""
+        free = cls(allowed)
+        for start, end in busy:
+            free.reserve(start, end)
+        return free
+
+    def __iter__(self) -> Iterator[Interval]:
+        stack: list[_Slot] = []
+        node = self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.start, node.end
+            node = node.right
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def total(self) -> timedelta:
+        """Return the total free time."""
+        return sum((end - start for start, end in self), timedelta())
+
+    def reserve(self, start: datetime, end: datetime) -> None:
+        """Mark [start, end) as busy, splitting/trimming the slots it overlaps."""
+        if start >= end:
+            return
+
+        before, rest = _split(self._root, start)
+        overlapped, after = _split(rest, end)
+
+        # Keep the parts of the first/last overlapped slots that stick out.
+        kept: _Slot | None = None
+        sticks_out_until = start
+        if before is not None:
+            before, last = _pop_last(before)
+            kept = _Slot(last.start, min(last.end, start))
+            sticks_out_until = last.end
+        if overlapped is not None:
+            _, last = _pop_last(overlapped)
+            sticks_out_until = max(sticks_out_until, last.end)
+        if sticks_out_until > end:
+            kept = _merge(kept, _Slot(end, sticks_out_until))
+
+        self._root = _merge(_merge(before, kept), after)
+
+    def release(self, start: datetime, end: datetime) -> None:
+        """Mark [start, end) as free, merging it with any touching slots."""
+        if start >= end:
+            return
+
+        before, rest = _split(self._root, start)
+        touching, after = _split(rest, end, inclusive=True)
+        if before is not None:
+            before, last = _pop_last(before)
+            if last.end >= start:
+                start, end = last.start, max(end, last.end)
+            else:
+                before = _merge(before, last)
+        if touching is not None:
+            _, last = _pop_last(touching)
+            end = max(end, last.end)
+
+        self._root = _merge(_merge(before, _Slot(start, end)), after)
+
+    def place(
+        self,
+        duration: timedelta,
+        not_before: datetime,
+        deadline: datetime,
+        min_chunk: timedelta,
+        max_chunk: timedelta | None = None,
+    ) -> list[Interval]:
+        """
+        Reserve up to `duration` of free time within [not_before, deadline), earliest first.
+
+        At most one chunk of `max_chunk` is taken from each slot, and chunks
+        shorter than `min_chunk` are only used for the very last bit of the
+        duration. Returns the reserved chunks, which may add up to less than
+        `duration` if there isn't enough free time.
+
+        Slots too short to use are skipped by searching the tree for the next
+        long enough one, rather than by visiting them.
+        """
+        chunks: list[Interval] = []
+        remaining = duration
+        slot = _first_ending_after(self._root, not_before)
+
+        while remaining > timedelta() and slot is not None:
+            start = max(slot.start, not_before)
+            if start >= deadline:
+                break
+
+            available = min(slot.end, deadline) - start
+            if available >= min(min_chunk, remaining):
+                length = min(available, remaining)
+                if max_chunk is not None:
+                    length = min(length, max_chunk)
+                chunks.append((start, start + length))
+                remaining -= length
+            # Later slots start after this one ends, so are only clipped by the deadline.
+            slot = _first_fitting(self._root, slot.end, min(min_chunk, remaining))
+
+        for start, end in chunks:
+            self.reserve(start, end)
+
+        return chunks
+
+
+def _update(node: _Slot) -> _Slot:
+    node.longest = node.end - node.start
+    if node.left is not None and node.left.longest > node.longest:
+        node.longest = node.left.longest
+    if node.right is not None and node.right.longest > node.longest:
+        node.longest = node.right.longest
+    return node
+
+
+def _split(
+    node: _Slot | None,
+    key: datetime,
+    inclusive: bool = False,
+) -> tuple[_Slot | None, _Slot | None]:
+    """Split a tree into the slots starting before `key` (or at it, if `inclusive`) and the rest."""
+    if node is None:
+        return None, None
+    if node.start < key or (inclusive and node.start == key):
+        node.right, right = _split(node.right, key, inclusive)
+        return _update(node), right
+    left, node.left = _split(node.left, key, inclusive)
+    return left, _update(node)
+
+
+def _merge(left: _Slot | None, right: _Slot | None) -> _Slot | None:
+    """Join two trees, every slot of `left` being before every slot of `right`."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+def _pop_last(node: _Slot) -> tuple[_Slot | None, _Slot]:
+    """Remove the last slot of a (non-empty) tree, and return the tree and that slot."""
+    if node.right is None:
+        rest, node.left = node.left, None
+        return rest, _update(node)
+    node.right, last = _pop_last(node.right)
+    return _update(node), last
+
+
+def _first_ending_after(node: _Slot | None, moment: datetime) -> _Slot | None:
+    # Ends are in the same order as starts, since slots don't overlap.
+    found = None
+    while node is not None:
+        if node.end > moment:
+            found, node = node, node.left
+        else:
+            node = node.right
+    return found
+
+
+def _first_fitting(node: _Slot | None, after: datetime, length: timedelta) -> _Slot | None:
+    """Return the first slot starting at/after `after` that lasts at least `length`."""
+    if node is None or node.longest < length:
+        return None
+    if node.start < after:
+        return _first_fitting(node.right, after, length)
+    found = _first_fitting(node.left, after, length)
+    if found is None and node.end - node.start >= length:
+        found = node
+    if found is None:
+        found = _first_fitting(node.right, after, length)
+    return found
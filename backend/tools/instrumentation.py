@@ -0,0 +1,242 @@
+import functools
+import threading
+from collections import defaultdict
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, ParamSpec, TypeVar
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+# Key of `Connection.info` holding the start times of the statements being executed.
+_QUERY_STARTS_KEY = "instrumentation_query_starts"
+# Upper bounds (in seconds) of the request duration histogram's buckets.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestTimings:
+    """
+    Seconds spent in each phase (e.g., "db", "serialize") of the current request.
+
+    Phases can overlap (e.g., the scheduler's own queries also count as "db").
+    """
+
+    __slots__ = ("phases", "queries")
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = defaultdict(float)
+        self.queries = 0
+
+    def server_timing(self, total: float) -> str:
+        """Render the timings as a `Server-Timing` header value (in milliseconds)."""
+        metrics = [f'db;dur={self.phases["db"] * 1000:.1f};desc="{self.queries} queries"']
+        metrics.extend(
+            f"{phase};dur={seconds * 1000:.1f}"
+            for phase, seconds in self.phases.items()
+            if phase != "db"
+        )
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+# Timings of the request being handled, None outside of instrumented requests.
+_current_timings: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Add the time spent in the block to a phase of the current request (if instrumented)."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.phases[phase] += perf_counter() - start
+
+
+def timed_calls(phase: str) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
+    """Decorate a coroutine function so that its calls are `timed` as `phase`."""
+
+    def decorate(function: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
+        @functools.wraps(function)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            with timed(phase):
+                return await function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def instrument_engine(engine: Engine | AsyncEngine) -> None:
+    """Count the statements executed on the engine, and their time, as the "db" phase."""
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    # Failed statements don't get `after_cursor_execute`, but still count.
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(connection: Any, *_: Any) -> None:
+    connection.info.setdefault(_QUERY_STARTS_KEY, []).append(perf_counter())
+
+
+def _after_cursor_execute(connection: Any, *_: Any) -> None:
+    _record_query(connection.info[_QUERY_STARTS_KEY].pop())
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    # Also called for errors before the statement was sent (e.g., when connecting),
+    # so only pop a start time that is left.
+    if context.connection is None:
+        return
+    starts = context.connection.info.get(_QUERY_STARTS_KEY)
+    if starts:
+        _record_query(starts.pop())
+
+
+def _record_query(start: float) -> None:
+    # Async engines run statements in a greenlet that shares the request's context.
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.phases["db"] += perf_counter() - start
+        timings.queries += 1
+
+
+class _RouteStats:
+    __slots__ = ("count", "buckets", "seconds", "phases", "queries")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.seconds = 0.0
+        self.phases: dict[str, float] = defaultdict(float)
+        self.queries = 0
+
+
+class RequestMetrics:
+    """
+    Totals of the instrumented requests per (method, route, status), rendered in the
+    Prometheus text format.
+
+    Each worker process has its own, so scrape every process (or run a single one).
+    """
+
+    def __init__(self) -> None:
+        self._routes: dict[tuple[str, str, int], _RouteStats] = defaultdict(_RouteStats)
+        self._lock = threading.Lock()
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        timings: RequestTimings,
+    ) -> None:
+        with self._lock:
+            stats = self._routes[(method, route, status)]
+            stats.count += 1
+            stats.seconds += seconds
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    stats.buckets[index] += 1
+            for phase, phase_seconds in timings.phases.items():
+                stats.phases[phase] += phase_seconds
+            stats.queries += timings.queries
+
+    def render(self) -> str:
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                "# HELP http_request_duration_seconds Time spent handling requests.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for key, stats in routes:
+                labels = _labels(key)
+                for bound, count in zip(DURATION_BUCKETS, stats.buckets):
+                    lines.append(
+                        f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}'
+                    )
+                lines.append(
+                    f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}'
+                )
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {stats.seconds}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {stats.count}")
+
+            lines.append("# HELP http_request_phase_seconds_total Time spent in each phase.")
+            lines.append("# TYPE http_request_phase_seconds_total counter")
+            for key, stats in routes:
+                for phase, seconds in sorted(stats.phases.items()):
+                    lines.append(
+                        f'http_request_phase_seconds_total{{{_labels(key)},phase="{phase}"}} '
+                        f"{seconds}"
+                    )
+
+            lines.append("# HELP http_request_db_queries_total Statements sent to the DB.")
+            lines.append("# TYPE http_request_db_queries_total counter")
+            for key, stats in routes:
+                lines.append(f"http_request_db_queries_total{{{_labels(key)}}} {stats.queries}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(key: tuple[str, str, int]) -> str:
+    method, route, status = key
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}",status="{status}"'
+
+
+request_metrics = RequestMetrics()
+
+
+class InstrumentationMiddleware:
+    """
+    Time each request (and its phases, see `timed`), add a `Server-Timing` header
+    to the response, and record the totals in `request_metrics`.
+
+    Requests are labelled by route template (e.g., /tasks/{taskID}), so that the
+    number of series doesn't grow with the number of users or IDs.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics = request_metrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        start = perf_counter()
+        status = 500
+
+        async def send_with_timings(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.server_timing(perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _current_timings.reset(token)
+            # Set by the router once the request is matched.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            self.metrics.observe(scope["method"], route, status, perf_counter() - start, timings)
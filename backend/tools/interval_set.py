@@ -0,0 +1,144 @@
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime, timedelta
+
+import numpy as np
+import numpy.typing as npt
+
+from backend.tools.free_slots import Interval
+
+# Times are stored as microseconds since the epoch (of naive UTC datetimes).
+_UNIT = "datetime64[us]"
+
+Array = npt.NDArray[np.int64]
+
+
+class IntervalSet:
+    """
+    Immutable set of time, stored as sorted, disjoint [start, end) intervals.
+
+    Starts and ends are kept in two int64 NumPy arrays, so that set operations
+    over many intervals (e.g., years of events) run as a handful of array
+    operations instead of Python loops over datetimes. Touching intervals
+    are merged, so equal sets always have equal arrays.
+    """
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, starts: Array, ends: Array) -> None:
+        """Wrap already sorted, disjoint, non-touching intervals (see the other constructors)."""
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def empty(cls) -> "IntervalSet":
+        return cls(np.empty(0, np.int64), np.empty(0, np.int64))
+
+    @classmethod
+    def from_intervals(cls, intervals: Iterable[Interval]) -> "IntervalSet":
+        """Build the set covered by (possibly unsorted/overlapping) naive UTC intervals."""
+        pairs = list(intervals)
+        if not pairs:
+            return cls.empty()
+
+        times = np.array(pairs, dtype=_UNIT).astype(np.int64)
+        return cls.from_arrays(times[:, 0], times[:, 1])
+
+    @classmethod
+    def from_arrays(cls, starts: Array, ends: Array) -> "IntervalSet":
+        """Build the set covered by (possibly unsorted/overlapping) intervals, as arrays."""
+        keep = starts < ends
+        starts, ends = starts[keep], ends[keep]
+        if not len(starts):
+            return cls.empty()
+
+        order = np.argsort(starts, kind="stable")
+        starts, ends = starts[order], ends[order]
+        # An interval starts a new group unless it begins before some earlier one ends.
+        reach = np.maximum.accumulate(ends)
+        new_group = np.empty(len(starts), dtype=bool)
+        new_group[0] = True
+        new_group[1:] = starts[1:] > reach[:-1]
+
+        group_starts = starts[new_group]
+        group_ends = reach[np.append(np.flatnonzero(new_group)[1:] - 1, len(starts) - 1)]
+        return cls(group_starts, group_ends)
+
+    def __iter__(self) -> Iterator[Interval]:
+        return zip(_to_datetimes(self.starts), _to_datetimes(self.ends))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return np.array_equal(self.starts, other.starts) and np.array_equal(self.ends, other.ends)
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({list(self)!r})"
+
+    def total(self) -> timedelta:
+        """Return the total time covered."""
+        return timedelta(microseconds=int((self.ends - self.starts).sum()))
+
+    def union(self, other: "IntervalSet") -> "IntervalSet":
+        return self._combine(other, np.logical_or)
+
+    def intersection(self, other: "IntervalSet") -> "IntervalSet":
+        return self._combine(other, np.logical_and)
+
+    def difference(self, other: "IntervalSet") -> "IntervalSet":
+        return self._combine(other, lambda mine, theirs: mine & ~theirs)
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+    def gaps(self, start: datetime, end: datetime) -> "IntervalSet":
+        """Return the time within [start, end) that isn't covered."""
+        return IntervalSet.from_intervals([(start, end)]) - self
+
+    def longer_than(self, length: timedelta) -> "IntervalSet":
+        """Return only the intervals that are at least `length` long."""
+        keep = self.ends - self.starts >= length // timedelta(microseconds=1)
+        return IntervalSet(self.starts[keep], self.ends[keep])
+
+    def _covers(self, points: Array) -> npt.NDArray[np.bool_]:
+        """Tell for each point whether it lies within one of the intervals."""
+        if not len(self.starts):
+            return np.zeros(len(points), dtype=bool)
+        index = np.searchsorted(self.starts, points, side="right") - 1
+        return (index >= 0) & (points < self.ends[np.maximum(index, 0)])
+
+    def _combine(
+        self,
+        other: "IntervalSet",
+        keep: Callable[[npt.NDArray[np.bool_], npt.NDArray[np.bool_]], npt.NDArray[np.bool_]],
+    ) -> "IntervalSet":
+        """
+        Apply a set operation by splitting time at every boundary of either set,
+        and keeping the elementary segments for which `keep(in self, in other)`.
+        """
+        points = np.union1d(
+            np.concatenate((self.starts, self.ends)),
+            np.concatenate((other.starts, other.ends)),
+        )
+        if len(points) < 2:
+            return IntervalSet.empty()
+
+        lefts, rights = points[:-1], points[1:]
+        kept = keep(self._covers(lefts), other._covers(lefts))
+        lefts, rights = lefts[kept], rights[kept]
+        if not len(lefts):
+            return IntervalSet.empty()
+
+        # Merge consecutive kept segments back into single intervals.
+        new_group = np.empty(len(lefts), dtype=bool)
+        new_group[0] = True
+        new_group[1:] = lefts[1:] != rights[:-1]
+        last_of_group = np.append(np.flatnonzero(new_group)[1:] - 1, len(lefts) - 1)
+        return IntervalSet(lefts[new_group], rights[last_of_group])
+
+
+def _to_datetimes(times: Array) -> list[datetime]:
+    return times.astype(_UNIT).tolist()
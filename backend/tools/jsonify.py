@@ -0,0 +1,51 @@
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from datetime import timedelta
+from typing import Any
+
+from fastapi import responses
+
+from backend.tools.instrumentation import timed
+
+# NOTE: Payloads built here are meant to be returned with `ORJSONResponse`, which
+# formats datetimes (and other non-JSON types) natively in one pass over the payload.
+
+
+class ORJSONResponse(responses.ORJSONResponse):
+    """
+    FastAPI's `ORJSONResponse`, whose rendering counts as the "serialize" phase of
+    instrumented requests (see tools/instrumentation.py).
+    """
+
+    def render(self, content: Any) -> bytes:
+        with timed("serialize"):
+            return super().render(content)
+
+
+def rows_to_dicts(
+    keys: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    converters: Mapping[str, Callable[[Any], Any]] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Turn selected row tuples into JSON-ready dicts, without ORM objects or pydantic models.
+
+    `converters` maps keys to functions applied to their values (e.g., to
+    turn a timedelta into minutes), only needed for types orjson can't dump.
+    """
+    if not converters:
+        return [dict(zip(keys, row)) for row in rows]
+
+    indexed = [(keys.index(key), convert) for key, convert in converters.items()]
+    payload = []
+    for row in rows:
+        values = list(row)
+        for index, convert in indexed:
+            if values[index] is not None:
+                values[index] = convert(values[index])
+        payload.append(dict(zip(keys, values)))
+    return payload
+
+
+def to_minutes(duration: timedelta) -> int:
+    """Return the number of whole minutes in a duration."""
+    return int(duration.total_seconds() // 60)
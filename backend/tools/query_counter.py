@@ -0,0 +1,50 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class QueryCounter:
+    """
+    Statements executed on an engine while counting (see `count_queries`).
+    """
+
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def assert_at_most(self, limit: int) -> None:
+        """Fail if more than `limit` statements were executed, listing all of them."""
+        if self.count > limit:
+            listing = "\n".join(f"  {statement}" for statement in self.statements)
+            raise AssertionError(f"Expected at most {limit} queries, got {self.count}:\n{listing}")
+
+    def _record(self, *args: Any) -> None:
+        # (conn, cursor, statement, parameters, context, executemany)
+        self.statements.append(args[2])
+
+
+@contextmanager
+def count_queries(engine: Engine | AsyncEngine) -> Iterator[QueryCounter]:
+    """
+    Count the statements executed on the engine within the block, e.g.,
+
+        with count_queries(async_engine) as queries:
+            await client.get("/tasks/user/joe?include=tags")
+        queries.assert_at_most(2)
+
+    Useful to check that a listing costs a bounded number of queries
+    regardless of its size (i.e., there are no N+1 lazy loads).
+    """
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    counter = QueryCounter()
+    event.listen(sync_engine, "before_cursor_execute", counter._record)
+    try:
+        yield counter
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", counter._record)
@@ -0,0 +1,33 @@
+import sys
+import time
+from collections import Counter
+from types import FrameType
+
+
+def sample_stacks(thread_id: int, duration: float, interval: float) -> Counter[str]:
+    """
+    Sample the stack of a thread every `interval` seconds for `duration` seconds, and
+    count how often each stack was seen.
+
+    Meant to be run in another thread than the sampled one (e.g., the event
+    loop's), which only pays for the samples being taken. Stacks are in the
+    "folded" format of flame graph tools, i.e., `outer;...;inner` frames.
+    """
+    stacks: Counter[str] = Counter()
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            stacks[_fold(frame)] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def _fold(frame: FrameType | None) -> str:
+    names: list[str] = []
+    while frame is not None:
+        code = frame.f_code
+        # Functions are told apart by where they're defined, not by the running line.
+        names.append(f"{code.co_qualname} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
@@ -1,5 +1,6 @@
 import zoneinfo
 from datetime import datetime
+from functools import lru_cache
 
 from backend.misc.defaults import DefaultUserSettings
 from backend.misc.logger import get_logger
@@ -7,6 +8,7 @@ from backend.misc.logger import get_logger
 log = get_logger(__name__)
 
 
+@lru_cache(maxsize=1024)
 def get_valid_or_default_timezone(timezone_name: str) -> zoneinfo.ZoneInfo:
     """Return ZoneInfo for name, fall back and log error if invalid."""
     try: